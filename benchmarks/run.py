@@ -0,0 +1,263 @@
+"""
+Offline benchmark suite: tracker page latency, badge throughput, score-log rates.
+
+Upstream APIs are served from a recorded cassette (see envsense/replay.py) with
+injected latency, so no keys or network are needed and runs are comparable.
+
+    python benchmarks/run.py                                 # everything -> benchmarks/results.json
+    python benchmarks/run.py --suite scorelog --sizes 10000,100000
+    python benchmarks/run.py --save-baseline                 # refresh benchmarks/baseline.json
+    python benchmarks/run.py --check                         # exit 1 on a regression vs the baseline
+
+Metric names say which way is better: ``*_per_s`` higher, ``*_ms`` lower.
+A metric regresses when it is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+CASSETTE = HERE / "cassettes" / "providers.json"
+BASELINE = HERE / "baseline.json"
+RESULTS = HERE / "results.json"
+SUITES = ("tracker", "badges", "scorelog")
+
+
+def _rate(n, secs):
+    return round(n / secs, 1) if secs > 0 else float("inf")
+
+
+def _ms(secs):
+    return round(secs * 1000, 2)
+
+
+def _best_rate(fn, items, repeat: int = 5):
+    """Calls per second of fn over items, best of `repeat` passes (as timeit does, to cut noise)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return _rate(len(items), best)
+
+
+# ── tracker: end-to-end page latency over replayed upstreams ─────────────
+def bench_tracker(iterations: int, latency_ms: float):
+    os.environ["ENVSENSE_REPLAY"] = str(CASSETTE)
+    os.environ["ENVSENSE_REPLAY_LATENCY_MS"] = str(latency_ms)
+    from streamlit.testing.v1 import AppTest
+    from envsense.diskcache import GAZETTEER
+    from envsense import providers
+
+    # gazetteer cities geocode from the seeded disk cache; every city is a fresh coordinate upstream
+    by_coord = {}
+    for line in GAZETTEER.read_text(encoding="utf-8").splitlines()[1:]:
+        name, _, lat, lon = line.split(",")
+        by_coord.setdefault((lat, lon), name)        # aliases (Bombay/Mumbai) share a point
+    cities = list(by_coord.values())
+    at = AppTest.from_file(str(ROOT / "airsense_app.py"), default_timeout=120).run()
+
+    def lookup(city):
+        at.text_input[0].input(city)
+        t0 = time.perf_counter()
+        at.button[0].click().run()
+        secs = time.perf_counter() - t0
+        if at.exception or not at.subheader:
+            raise RuntimeError(f"tracker failed for {city}: {[e.value for e in at.exception]}")
+        return secs
+
+    lookup(cities[0])                   # warm imports, pools and the station catalogue download
+    time.sleep(0.5)
+    cold = [lookup(c) for c in cities[1:iterations + 1]]
+    warm = [lookup(cities[1]) for _ in range(iterations)]
+    return {
+        "cold_p50_ms": _ms(statistics.median(cold)),
+        "cold_max_ms": _ms(max(cold)),
+        "warm_p50_ms": _ms(statistics.median(warm)),
+        "injected_latency_ms": latency_ms,
+        "upstream_calls": providers.session().get_adapter("https://").stats()["calls"],
+    }
+
+
+# ── badges: render throughput, cold and cached ───────────────────────────
+def bench_badges(n: int):
+    from envsense.badges import BADGE_THEMES, _render_badge, create_badge_image, get_badge
+
+    themes = list(BADGE_THEMES)
+    for theme in themes:                # build the per-theme backgrounds and fonts once
+        _render_badge("warm-up", get_badge(0), 0, theme, "🎖️")
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        _render_badge(f"User {i}", get_badge(i % 250), i % 250, themes[i % len(themes)], "🎖️")
+    render = time.perf_counter() - t0
+
+    create_badge_image("Cached", get_badge(120), 120)
+    t0 = time.perf_counter()
+    for _ in range(n * 100):
+        create_badge_image("Cached", get_badge(120), 120)
+    cached = time.perf_counter() - t0
+    return {"render_per_s": _rate(n, render), "render_ms": _ms(render / n),
+            "cached_per_s": _rate(n * 100, cached)}
+
+
+# ── score log: bulk load, interactive writes and reads at several sizes ──
+def _synthetic_rows(n: int, days: int = 90):
+    """n rows spread over `days` consecutive days; one row per (user, day)."""
+    from datetime import date, timedelta
+    users = max(1, -(-n // days))
+    start = date(2025, 1, 1)
+    for i in range(n):
+        u, d = i % users, i // users
+        yield (f"User {u}", f"user{u}@example.com", (start + timedelta(days=d)).isoformat(),
+               10 + (i * 7) % 120, "🌳 Planted a tree or sapling")
+
+
+def bench_scorelog(n: int, ops: int):
+    from envsense.scorestore import ScoreStore, month_key
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ScoreStore(Path(tmp) / "bench.db")
+        t0 = time.perf_counter()
+        batch = []
+        for row in _synthetic_rows(n):
+            batch.append(row)
+            if len(batch) == 5000:
+                store._insert_many(batch); batch = []
+        store._insert_many(batch)
+        store.rebuild_rollups()
+        store.rebuild_streaks()
+        bulk = time.perf_counter() - t0
+
+        users = max(1, -(-n // 90))
+        emails = [f"user{u % users}@example.com" for u in range(ops)]
+
+        t0 = time.perf_counter()
+        for i, email in enumerate(emails):
+            store.add(f"New {i}", f"new{i}@example.com", "2025-04-01", 40, "♻️")
+        add = time.perf_counter() - t0
+
+        bucket = month_key("2025-02-01")
+        reads = {
+            "has_submitted_per_s": _best_rate(lambda e: store.has_submitted(e, "2025-02-01"), emails),
+            "streak_per_s": _best_rate(lambda e: store.streak(e, "2025-04-01"), emails),
+            "user_history_per_s": _best_rate(store.user_history, emails[: max(1, ops // 10)]),
+            "leaderboard_per_s": _best_rate(lambda _: store.top("month", bucket, limit=10), emails),
+        }
+
+        t0 = time.perf_counter()
+        with open(os.devnull, "w", encoding="utf-8", newline="") as sink:
+            exported = store.export_csv(sink)
+        export = time.perf_counter() - t0
+
+    return {
+        "bulk_load_per_s": _rate(n, bulk),
+        "add_per_s": _rate(ops, add),
+        **reads,
+        "export_rows_per_s": _rate(exported, export),
+    }
+
+
+# ── baselines ────────────────────────────────────────────────────────────
+def _flatten(results, prefix=""):
+    out = {}
+    for k, v in results.items():
+        if isinstance(v, dict):
+            out.update(_flatten(v, f"{prefix}{k}."))
+        else:
+            out[f"{prefix}{k}"] = v
+    return out
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """[(metric, baseline, current, change)] for every metric worse than tolerance allows."""
+    cur, base = _flatten(results), _flatten(baseline)
+    regressions = []
+    for key, old in base.items():
+        new = cur.get(key)
+        if new is None or not old or key.endswith(("injected_latency_ms", "upstream_calls")):
+            continue
+        if key.endswith("_per_s"):
+            change = old / new - 1 if new else float("inf")
+        elif key.endswith("_ms"):
+            change = new / old - 1
+        else:
+            continue
+        if change > tolerance:
+            regressions.append((key, old, new, change))
+    return regressions
+
+
+def _meta():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "git_rev": rev, "when": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--suite", action="append", choices=SUITES, help="repeatable; default: all")
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="score-log row counts")
+    ap.add_argument("--ops", type=int, default=2000, help="interactive score-log operations per size")
+    ap.add_argument("--iterations", type=int, default=15, help="tracker lookups per measurement")
+    ap.add_argument("--latency-ms", type=float, default=80.0, help="injected upstream latency")
+    ap.add_argument("--badges", type=int, default=30, help="badges rendered")
+    ap.add_argument("--json", default=str(RESULTS), help="where to write this run's results")
+    ap.add_argument("--baseline", default=str(BASELINE))
+    ap.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any metric regressed vs the baseline")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 = 50%%")
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, str(ROOT))
+    out_path = Path(args.json).resolve()
+    baseline_path = Path(args.baseline).resolve()
+    os.chdir(tempfile.mkdtemp(prefix="envsense-bench-"))   # databases and caches stay out of the tree
+
+    results = {}
+    for suite in args.suite or SUITES:
+        t0 = time.perf_counter()
+        if suite == "tracker":
+            results[suite] = bench_tracker(args.iterations, args.latency_ms)
+        elif suite == "badges":
+            results[suite] = bench_badges(args.badges)
+        else:
+            results[suite] = {f"{int(n) // 1000}k": bench_scorelog(int(n), args.ops)
+                              for n in args.sizes.split(",")}
+        print(f"── {suite} ({time.perf_counter() - t0:.1f}s)")
+        for key, value in _flatten(results[suite]).items():
+            print(f"   {key:<42}{value:>14,}")
+
+    doc = {"meta": _meta(), "results": results}
+    out_path.write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding="utf-8")
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"baseline saved to {baseline_path}")
+
+    if args.check:
+        if not baseline_path.exists():
+            raise SystemExit(f"no baseline at {baseline_path}; run with --save-baseline first")
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for key, old, new, change in regressions:
+            print(f"REGRESSION {key}: {old:,} -> {new:,} ({change:+.0%})")
+        if regressions:
+            raise SystemExit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} vs {baseline_path.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold-start and rerun timings for the Streamlit app, one fresh process per page.
+
+    python benchmarks/startup.py                       # current tree
+    python benchmarks/startup.py --compare HEAD~1      # ... side by side with another revision
+    python benchmarks/startup.py --json startup.json
+
+For every page the child process times the first script run (interpreter warm,
+app cold), the first visit to the page, and the median of ``--reruns`` further
+reruns, which is what each widget interaction costs. No page makes a network
+call until a button is pressed, and each child works in a scratch directory.
+``--compare`` checks the revision out into a temporary ``git worktree``, so
+the other side runs that revision's app script and its own ``envsense``.
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PAGES = ["🌫️ Air Quality Tracker", "🌱 Eco Scoreboard", "📢 Report Pollution"]
+
+
+def child(script: str, page: str, reruns: int):
+    os.chdir(tempfile.mkdtemp(prefix="envsense-bench-"))
+    sys.path.insert(0, str(Path(script).resolve().parent))     # that tree's envsense, not ours
+    from streamlit.testing.v1 import AppTest
+
+    before = len(sys.modules)
+    at = AppTest.from_file(script, default_timeout=120)
+    t0 = time.perf_counter()
+    at.run()
+    boot = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    at.sidebar.selectbox[0].select(page).run()
+    first_visit = time.perf_counter() - t0
+    modules = len(sys.modules) - before
+
+    times = []
+    for _ in range(reruns):
+        t0 = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t0)
+    errors = [e.value for e in at.exception]
+    print(json.dumps({"boot_s": boot, "first_visit_s": first_visit,
+                      "rerun_median_s": statistics.median(times), "rerun_min_s": min(times),
+                      "modules_loaded": modules, "errors": errors}))
+
+
+def measure(script: str, reruns: int) -> dict:
+    out = {}
+    for page in PAGES:
+        proc = subprocess.run([sys.executable, __file__, "--child", script, page, str(reruns)],
+                              capture_output=True, text=True, encoding="utf-8")
+        if proc.returncode:
+            raise SystemExit(f"{page}: benchmark child failed\n{proc.stderr}")
+        out[page] = json.loads(proc.stdout.strip().splitlines()[-1])
+    return out
+
+
+@contextlib.contextmanager
+def checkout(ref: str):
+    """A throwaway git worktree of ref; yields the path of its app script."""
+    with tempfile.TemporaryDirectory(prefix="envsense-bench-ref-") as tmp:
+        tree = Path(tmp) / "tree"
+        subprocess.run(["git", "worktree", "add", "--detach", str(tree), ref], cwd=ROOT,
+                       capture_output=True, check=True)
+        try:
+            yield str(tree / "airsense_app.py")
+        finally:
+            subprocess.run(["git", "worktree", "remove", "--force", str(tree)], cwd=ROOT, capture_output=True)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reruns", type=int, default=20)
+    ap.add_argument("--compare", metavar="REF", help="git revision to benchmark alongside the working tree")
+    ap.add_argument("--json", metavar="PATH", help="write the raw results here")
+    ap.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        script, page, reruns = args.child
+        return child(script, page, int(reruns))
+
+    results = {"current": measure(str(ROOT / "airsense_app.py"), args.reruns)}
+    if args.compare:
+        with checkout(args.compare) as script:
+            results[args.compare] = measure(script, args.reruns)
+
+    print(f"{'page':<24}{'variant':<12}{'boot':>9}{'visit':>9}{'rerun':>9}{'modules':>9}")
+    for page in PAGES:
+        for variant, pages in results.items():
+            r = pages[page]
+            print(f"{page:<24}{variant:<12}{r['boot_s'] * 1000:>7.0f}ms{r['first_visit_s'] * 1000:>7.0f}ms"
+                  f"{r['rerun_median_s'] * 1000:>7.1f}ms{r['modules_loaded']:>9}"
+                  + (f"  errors: {r['errors']}" if r["errors"] else ""))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
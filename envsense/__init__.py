@@ -0,0 +1 @@
+"""EnvSense Pro — storage and service helpers shared by the Streamlit pages."""
@@ -0,0 +1,218 @@
+"""
+Eco badge rendering: PNG certificates for the scoreboard.
+
+No Streamlit dependency. Fonts and theme backgrounds depend only on their
+arguments, so they are built once per process; finished PNGs go into a
+byte-capped LRU (``BADGE_CACHE_MB``, default 32) shared by every session.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from envsense import metrics
+
+FONT_CANDIDATES = ("DejaVuSans.ttf", "arial.ttf")
+
+BADGE_W, BADGE_H = 900, 520
+BADGE_THEMES = {
+    "Leaf":    ("#d0f9d8", "#6be585"),
+    "Ocean":   ("#bbdefb", "#64b5f6"),
+    "Sunrise": ("#ffe082", "#fb8c00"),
+}
+
+
+def get_badge(score: int) -> str:
+    if score >= 200:  return "🌎 Climate Champion"
+    if score >= 100:  return "🌿 Eco Hero"
+    if score >= 50:   return "🍀 Green Achiever"
+    if score >= 20:   return "🌱 Planet Helper"
+    return "🌼 Eco Beginner"
+
+
+@lru_cache(maxsize=None)
+def _font_path():
+    """First usable TTF on this host, or None for Pillow's default. Resolved once per process."""
+    for candidate in FONT_CANDIDATES:
+        try:
+            ImageFont.truetype(candidate, 12)
+            return candidate
+        except OSError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=None)
+def _load_font(size: int):
+    """Try nicer TTFs; fall back to default. One font object per size, shared across reruns."""
+    path = _font_path()
+    return ImageFont.truetype(path, size) if path else ImageFont.load_default()
+
+
+class BadgeCache:
+    """Bounded LRU of finished badge PNGs, capped by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._items.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png: bytes):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = png
+            self.size += len(png)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+@lru_cache(maxsize=None)
+def badge_cache() -> BadgeCache:
+    return BadgeCache(max_bytes=int(os.getenv("BADGE_CACHE_MB", "32")) * 1024 * 1024)
+
+
+@metrics.collector
+def _collect():
+    if badge_cache.cache_info().currsize:
+        st = badge_cache().stats()
+        for result in ("hits", "misses"):
+            yield "envsense_cache_events_total", "counter", {"cache": "badges", "result": result}, st[result]
+        yield "envsense_cache_entries", "gauge", {"cache": "badges"}, st["entries"]
+        yield "envsense_cache_bytes", "gauge", {"cache": "badges"}, st["bytes"]
+
+
+def _make_linear_gradient(w, h, c1, c2):
+    """Vertical gradient from hex c1 -> c2."""
+    top = np.array([int(c1[i:i+2], 16) for i in (1,3,5)], dtype=np.float32)
+    bot = np.array([int(c2[i:i+2], 16) for i in (1,3,5)], dtype=np.float32)
+    t = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None]
+    rows = (top + (bot - top) * t).astype(np.uint8)          # (h, 3)
+    return Image.fromarray(np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (h, w, 3))))
+
+
+@lru_cache(maxsize=None)
+def _theme_background(theme: str):
+    """Gradient + vignette + card for a theme. Depends only on the theme, so built once per process."""
+    W, H = BADGE_W, BADGE_H
+    c1, c2 = BADGE_THEMES[theme]
+    bg = _make_linear_gradient(W, H, c1, c2).convert("RGBA")
+
+    # soft vignette
+    shadow = Image.new("RGBA", (W, H), (0,0,0,0))
+    sd = ImageDraw.Draw(shadow)
+    sd.ellipse((-80, -80, W+80, H+80), fill=(0,0,0,60))
+    shadow = shadow.filter(ImageFilter.GaussianBlur(40))
+    out = Image.alpha_composite(bg, shadow)
+
+    # rounded white card
+    card = Image.new("RGBA", (W, H), (0,0,0,0))
+    cd = ImageDraw.Draw(card)
+    rr, pad = 28, 60
+    cd.rounded_rectangle((pad, pad, W-pad, H-pad), radius=rr,
+                         fill=(255,255,255,235), outline=(0,0,0,30), width=2)
+    return Image.alpha_composite(out, card).convert("RGB")
+
+
+def _center(draw, text, font, y, x_center):
+    bbox = draw.textbbox((0,0), text, font=font)
+    w = bbox[2]-bbox[0]
+    return x_center - w//2, y
+
+
+@metrics.timed("envsense_function_seconds", fn="create_badge_image")
+def create_badge_image(name: str, badge_title: str, score: int,
+                       theme: str = "Leaf", badge_emoji: str = "🎖️") -> bytes:
+    """Return PNG bytes of a colorful badge, served from the badge cache when possible."""
+    theme = theme if theme in BADGE_THEMES else "Leaf"
+    key = (name, badge_title, score, theme, badge_emoji)
+    cache = badge_cache()
+    png = cache.get(key)
+    if png is None:
+        png = _render_badge(*key)
+        cache.put(key, png)
+    return png
+
+
+@metrics.timed("envsense_function_seconds", fn="render_badge")
+def _render_badge(name, badge_title, score, theme, badge_emoji, score_label="Score Today") -> bytes:
+    W, H = BADGE_W, BADGE_H
+    # the cached layer is shared across sessions — draw on a copy
+    out = _theme_background(theme).copy()
+
+    draw = ImageDraw.Draw(out)
+    font_title = _load_font(48)
+    font_name  = _load_font(42)
+    font_body  = _load_font(30)
+    font_small = _load_font(24)
+
+    cx, y = W//2, 95
+
+    # emoji
+    ex, ey = _center(draw, badge_emoji, font_title, y, cx)
+    draw.text((ex, ey), badge_emoji, font=font_title, fill=(40,40,40))
+    y += 56
+
+    # header
+    hdr = "Eco Badge Awarded!"
+    hx, hy = _center(draw, hdr, font_title, y, cx)
+    draw.text((hx, hy), hdr, font=font_title, fill=(34,139,34))
+    y += 68
+
+    # name
+    nm = f"Name: {name}"
+    nx, ny = _center(draw, nm, font_name, y, cx)
+    draw.text((nx, ny), nm, font=font_name, fill=(20,20,20))
+    y += 58
+
+    # badge title
+    bt = f"Badge: {badge_title}"
+    bx, by = _center(draw, bt, font_body, y, cx)
+    draw.text((bx, by), bt, font=font_body, fill=(60,60,60))
+    y += 44
+
+    # score
+    sc = f"{score_label}: {score}"
+    sx, sy = _center(draw, sc, font_body, y, cx)
+    draw.text((sx, sy), sc, font=font_body, fill=(60,60,60))
+    y += 56
+
+    # tagline + leaves
+    tag = "“Thank you for making Earth cleaner!”"
+    tx, ty = _center(draw, tag, font_small, y, cx)
+    draw.text((tx, ty), tag, font=font_small, fill=(80,80,80))
+    leaf = "🌿"
+    draw.text((78, 78), leaf, font=font_small, fill=(50,120,50))
+    draw.text((W-110, 78), leaf, font=font_small, fill=(50,120,50))
+    draw.text((78, H-110), leaf, font=font_small, fill=(50,120,50))
+    draw.text((W-110, H-110), leaf, font=font_small, fill=(50,120,50))
+
+    buf = io.BytesIO()
+    out.save(buf, format="PNG")     # optimize=True is ~5x slower for ~5% smaller files
+    return buf.getvalue()
@@ -0,0 +1,164 @@
+"""
+Month-end badges for everyone on a month's leaderboard, rendered across a process pool.
+
+Badge rendering is CPU-bound (text layout plus PNG compression), so it runs in
+worker processes. The parent only streams finished PNGs into a ZIP or a
+directory, with a ``manifest.csv`` alongside. Throughput scales with
+``--workers``, which defaults to the number of cores.
+
+    python -m envsense.bulkbadges 2025-07 --out badges-2025-07.zip
+    python -m envsense.bulkbadges 2025-07 --out badges/ --workers 8 --theme Ocean
+"""
+import csv
+import io
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from envsense import badges
+from envsense.badges import BADGE_THEMES, get_badge
+
+MANIFEST_COLUMNS = ["Rank", "Name", "Total Score", "Badge", "File"]
+
+
+def monthly_winners(store, month: str, limit: int = None):
+    """[(rank, name, total), ...] for a YYYY-MM month, from the score rollups."""
+    return [(rank, name, total)
+            for rank, (name, total) in enumerate(store.top("month", month, limit=limit), start=1)]
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name, flags=re.UNICODE).strip("_")[:60] or "user"
+
+
+def _warm(theme: str) -> None:
+    # build fonts and the theme background once per worker, not per badge
+    badges._theme_background(theme)
+    for size in (24, 30, 42, 48):
+        badges._load_font(size)
+
+
+def _render(job):
+    rank, name, total, theme, month = job
+    emoji = "🏆" if rank <= 3 else "🎖️"
+    png = badges._render_badge(name, get_badge(total), total, theme, emoji,
+                               score_label=f"Score for {month}")
+    return rank, png
+
+
+class _ZipSink:
+    def __init__(self, out):
+        self.zf = zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED)   # PNGs don't deflate
+
+    def write(self, filename: str, data: bytes):
+        self.zf.writestr(filename, data)
+
+    def close(self):
+        self.zf.close()
+
+
+class _DirSink:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def write(self, filename: str, data: bytes):
+        (self.root / filename).write_bytes(data)
+
+    def close(self):
+        pass
+
+
+def generate(winners, out, month: str, workers: int = None, theme: str = "Leaf",
+             on_progress=None) -> dict:
+    """
+    Render a badge for every (rank, name, total) in winners into out: a ``.zip``
+    path, a directory path or a writable binary file (written as a ZIP).
+    on_progress(done, total) is called as badges land. Returns run statistics.
+    """
+    theme = theme if theme in BADGE_THEMES else "Leaf"
+    workers = max(1, workers or os.cpu_count() or 1)
+    if hasattr(out, "write"):
+        sink = _ZipSink(out)
+    elif str(out).lower().endswith(".zip"):
+        sink = _ZipSink(str(out))
+    else:
+        sink = _DirSink(out)
+
+    files = {rank: f"{rank:04d}_{_slug(name)}.png" for rank, name, _ in winners}
+    jobs = iter([(rank, name, total, theme, month) for rank, name, total in winners])
+    total, done = len(files), 0
+    t0 = time.perf_counter()
+    # spawn, not fork: the caller may be a threaded Streamlit server
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                 initializer=_warm, initargs=(theme,)) as pool:
+            # keep a bounded window in flight so memory stays flat for any leaderboard size
+            pending = set()
+            while True:
+                while len(pending) < workers * 4:
+                    job = next(jobs, None)
+                    if job is None:
+                        break
+                    pending.add(pool.submit(_render, job))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    rank, png = fut.result()
+                    sink.write(files[rank], png)
+                    done += 1
+                    if on_progress:
+                        on_progress(done, total)
+
+        manifest = io.StringIO()
+        writer = csv.writer(manifest)
+        writer.writerow(MANIFEST_COLUMNS)
+        for rank, name, score in winners:
+            writer.writerow([rank, name, score, get_badge(score), files[rank]])
+        sink.write("manifest.csv", manifest.getvalue().encode("utf-8"))
+    finally:
+        sink.close()
+
+    secs = time.perf_counter() - t0
+    return {"badges": done, "workers": workers, "seconds": round(secs, 2),
+            "per_second": round(done / secs, 1) if secs else None}
+
+
+def main(argv=None):
+    import argparse
+    from envsense.db import DEFAULT_DB
+    from envsense.scorestore import ScoreStore
+
+    ap = argparse.ArgumentParser(prog="python -m envsense.bulkbadges",
+                                 description="Render month-end badges for everyone on the leaderboard.")
+    ap.add_argument("month", help="YYYY-MM")
+    ap.add_argument("--out", help="a .zip file or a directory (default badges-<month>.zip)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--theme", default="Leaf", choices=list(BADGE_THEMES))
+    ap.add_argument("--limit", type=int, default=None, help="only the top N users")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    args = ap.parse_args(argv)
+
+    winners = monthly_winners(ScoreStore(args.db), args.month, args.limit)
+    if not winners:
+        raise SystemExit(f"no scores recorded for {args.month}")
+    out = args.out or f"badges-{args.month}.zip"
+
+    def progress(done, total):
+        print(f"\r{done}/{total} badges", end="", file=sys.stderr, flush=True)
+
+    stats = generate(winners, out, args.month, args.workers, args.theme, on_progress=progress)
+    print(file=sys.stderr)
+    print(f"wrote {stats['badges']} badges to {out} in {stats['seconds']}s "
+          f"({stats['per_second']}/s on {stats['workers']} worker(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Process-wide memo for upstream calls with single-flight loading and
+stale-while-revalidate.
+
+* At most one load per key is in flight; concurrent callers wait on it, so
+  upstream QPS is bounded by the number of distinct keys, not by users.
+* Past ``ttl`` an entry is still served for ``stale_ttl`` more seconds while
+  a single background refresh replaces it, so an expiry never stalls a page.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_refresh_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="envsense-revalidate")
+
+
+class SWRCache:
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_entries: int = 4096,
+                 wait_timeout: float = 30.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self.hits = self.stale_hits = self.misses = self.coalesced = 0
+        self._entries = OrderedDict()      # key -> (value, stored_at)
+        self._inflight = {}                # key -> Future
+        self._lock = threading.Lock()
+
+    def get(self, key, loader, wait_timeout: float = None):
+        """
+        Value for key, calling loader() at most once across concurrent callers.
+        A caller that joins another's load waits at most wait_timeout seconds
+        (default: the cache's) and then gets TimeoutError; the load carries on.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored = entry
+                age = now - stored
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._inflight:
+                        fut = self._inflight[key] = Future()
+                        _refresh_pool.submit(self._load, key, loader, fut)
+                    return value
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                self.misses += 1
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if leader:
+            self._load(key, loader, fut)
+        return fut.result(timeout=self.wait_timeout if wait_timeout is None else wait_timeout)
+
+    def _load(self, key, loader, fut: Future) -> None:
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(e)
+            return
+        with self._lock:
+            if value is not None:   # failures are never memoised
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            self._inflight.pop(key, None)
+        fut.set_result(value)
+
+    def peek(self, key):
+        """Cached value regardless of age, or None; never loads."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "inflight": len(self._inflight),
+                    "hits": self.hits, "stale_hits": self.stale_hits,
+                    "misses": self.misses, "coalesced": self.coalesced}
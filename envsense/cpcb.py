@@ -0,0 +1,96 @@
+"""
+CPCB National AQI from pollutant concentrations, vectorised with numpy.
+
+Rows are readings (stations x timestamps), columns are pollutants in µg/m³
+(CO is converted to mg/m³ internally, as CPCB specifies). Each sub-index
+is a linear interpolation inside its CPCB breakpoint band and the AQI is
+the worst sub-index, so thousands of readings are scored in one pass.
+
+Above the last published breakpoint the 'Severe' band is given the width
+of the 'Very Poor' band, and every index is capped at 500.
+"""
+import numpy as np
+import pandas as pd
+
+INDEX_EDGES = np.array([0, 50, 100, 200, 300, 400, 500], dtype=float)
+
+# concentration breakpoints matching INDEX_EDGES (24-h averages; O3 and CO 8-h)
+BREAKPOINTS = {
+    "pm10": [0, 50, 100, 250, 350, 430],
+    "pm25": [0, 30, 60, 90, 120, 250],
+    "no2":  [0, 40, 80, 180, 280, 400],
+    "o3":   [0, 50, 100, 168, 208, 748],
+    "co":   [0, 1.0, 2.0, 10, 17, 34],      # mg/m³
+    "so2":  [0, 40, 80, 380, 800, 1600],
+    "nh3":  [0, 200, 400, 800, 1200, 1800],
+}
+POLLUTANTS = list(BREAKPOINTS)
+# upper edge of 'Satisfactory' (sub-index 100) in µg/m³ — the usual "safe limit"
+SAFE_LIMITS = {p: b[2] * (1000 if p == "co" else 1) for p, b in BREAKPOINTS.items()}
+
+_B = np.array([b + [2 * b[-1] - b[-2]] for b in BREAKPOINTS.values()], dtype=float)  # (P, 7)
+_SCALE = np.array([1e-3 if p == "co" else 1.0 for p in POLLUTANTS])                  # µg -> mg for CO
+
+# molecular weights for ppm/ppb -> µg/m³ at 25 °C, 1 atm
+_MW = {"co": 28.01, "no2": 46.01, "o3": 48.00, "so2": 64.07, "nh3": 17.03}
+
+
+def to_ugm3(pollutant: str, value, unit: str):
+    """Convert a reading to µg/m³ from µg/m³, mg/m³, ppm or ppb."""
+    unit = (unit or "µg/m³").lower().replace("ug", "µg")
+    if unit in ("µg/m³", "µg/m3"):
+        return value
+    if unit in ("mg/m³", "mg/m3"):
+        return value * 1000.0
+    mw = _MW.get(pollutant)
+    if mw is None:
+        return np.nan
+    if unit == "ppm":
+        return value * mw * 1000.0 / 24.45
+    if unit == "ppb":
+        return value * mw / 24.45
+    return np.nan
+
+
+def sub_indices(readings: pd.DataFrame) -> pd.DataFrame:
+    """CPCB sub-index per pollutant column (NaN where the reading is missing)."""
+    conc = readings.reindex(columns=POLLUTANTS).to_numpy(dtype=float) * _SCALE     # (N, P)
+    conc = np.clip(conc, 0, None)
+    band = (conc[:, :, None] >= _B[None, :, 1:]).sum(axis=2).clip(max=5)          # (N, P) in 0..5
+    p_idx = np.arange(len(POLLUTANTS))[None, :]
+    b_lo, b_hi = _B[p_idx, band], _B[p_idx, band + 1]
+    i_lo, i_hi = INDEX_EDGES[band], INDEX_EDGES[band + 1]
+    idx = i_lo + (i_hi - i_lo) * (conc - b_lo) / (b_hi - b_lo)
+    return pd.DataFrame(np.minimum(idx, 500.0), columns=POLLUTANTS, index=readings.index)
+
+
+def aqi(readings: pd.DataFrame, strict: bool = True) -> pd.DataFrame:
+    """
+    Overall AQI, dominant pollutant and valid-pollutant count for each row.
+
+    With ``strict`` (CPCB rule) a row needs at least three pollutants, one of
+    them PM2.5 or PM10; otherwise its AQI is NaN.
+    """
+    si = sub_indices(readings)
+    n = si.notna().sum(axis=1)
+    overall = si.max(axis=1, skipna=True)
+    dominant = si.fillna(-1).idxmax(axis=1).where(n > 0)
+    if strict:
+        ok = (n >= 3) & (si["pm25"].notna() | si["pm10"].notna())
+        overall = overall.where(ok)
+        dominant = dominant.where(ok)
+    return pd.DataFrame({"aqi": overall.round(), "dominant": dominant, "pollutants": n})
+
+
+def aqi_from_concentrations(concs: dict, strict: bool = True):
+    """
+    Score one OpenAQ-style {pollutant: {"value", "unit"}} dict.
+    Returns (aqi or None, dominant or None, {pollutant: sub-index}).
+    """
+    row = {p: to_ugm3(p, v["value"], v.get("unit")) for p, v in (concs or {}).items()
+           if p in BREAKPOINTS and v.get("value") is not None}
+    df = pd.DataFrame([row])
+    si = sub_indices(df).iloc[0].dropna()
+    res = aqi(df, strict=strict).iloc[0]
+    value = None if pd.isna(res["aqi"]) else int(res["aqi"])
+    return value, (res["dominant"] if value is not None else None), si.round().astype(int).to_dict()
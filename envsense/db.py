@@ -0,0 +1,13 @@
+"""Shared SQLite settings for the app's local stores."""
+import os
+import sqlite3
+
+DEFAULT_DB = os.getenv("ENVSENSE_DB", "envsense.db")
+
+
+def connect(path=DEFAULT_DB) -> sqlite3.Connection:
+    """Open a WAL-mode connection that may be shared across Streamlit threads."""
+    conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
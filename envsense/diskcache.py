@@ -0,0 +1,159 @@
+"""
+Persistent cache for upstream responses (geocodes, WAQI, OpenAQ, OpenWeather).
+
+The middle layer of memo -> disk -> network in ``envsense.providers``: the
+in-process memo (``envsense.coalesce``) absorbs reruns and concurrent
+sessions, this one survives pod restarts and redeploys so a fresh process
+starts warm, and only a miss here reaches the provider. Expired entries are
+kept as the last-known fallback for when a provider is down.
+Entries are JSON, namespaced per endpoint with their own TTL, and the file
+is kept under a byte budget by evicting expired and then least-recently-used
+rows.
+"""
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from envsense import metrics
+
+DEFAULT_PATH = os.getenv("ENVSENSE_CACHE_DB", "envsense_cache.db")
+DEFAULT_MAX_BYTES = int(os.getenv("ENVSENSE_CACHE_MB", "64")) * 1024 * 1024
+GAZETTEER = Path(__file__).with_name("data") / "gazetteer.csv"
+
+DAY = 24 * 3600
+# seconds; coordinates of a city name practically never change
+TTLS = {
+    "geocode": 90 * DAY,
+    "waqi": 300,
+    "openaq": 600,
+    "weather": 600,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    ns       TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    value    TEXT NOT NULL,
+    expires  REAL NOT NULL,
+    accessed REAL NOT NULL,
+    size     INTEGER NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+"""
+
+
+class DiskCache:
+    def __init__(self, path=DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES, ttls=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttls = dict(TTLS, **(ttls or {}))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            # expired rows are kept as a fallback for when a provider is down; _evict drops them first
+            self.size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        self._evict()
+
+    @metrics.timed("envsense_storage_seconds", store="diskcache", op="get")
+    def get(self, ns: str, key: str, allow_expired: bool = False):
+        """Cached value or None when missing/expired (expired entries allowed as a last resort)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            if row is None or (row[1] < now and not allow_expired):
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._conn:
+                self._conn.execute("UPDATE cache SET accessed = ? WHERE ns = ? AND key = ?",
+                                   (now, ns, key))
+        return json.loads(row[0])
+
+    @metrics.timed("envsense_storage_seconds", store="diskcache", op="set")
+    def set(self, ns: str, key: str, value, ttl: float = None) -> None:
+        blob = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        ttl = self.ttls.get(ns, 600) if ttl is None else ttl
+        with self._lock, self._conn:
+            old = self._conn.execute(
+                "SELECT size FROM cache WHERE ns = ? AND key = ?", (ns, key)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires, accessed, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (ns, key, blob, now + ttl, now, len(blob)))
+            self.size += len(blob) - (old[0] if old else 0)
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def seed(self, ns: str, items: dict, ttl: float = None) -> int:
+        """Insert {key: value} pairs that are missing or expired; live entries win."""
+        now = time.time()
+        ttl = self.ttls.get(ns, 600) if ttl is None else ttl
+        rows = [(ns, k, json.dumps(v, separators=(",", ":")), now + ttl, now) for k, v in items.items()]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO cache (ns, key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+                "accessed = excluded.accessed, size = excluded.size WHERE cache.expires < excluded.accessed",
+                [(*r, len(r[2])) for r in rows])
+            added = self._conn.total_changes - before
+            self.size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        return added
+
+    def get_or_load(self, ns: str, key: str, loader, ttl: float = None):
+        """Return the cached value, else call loader() and cache a non-None result."""
+        value = self.get(ns, key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(ns, key, value, ttl)
+        return value
+
+    def _evict(self) -> None:
+        """Drop expired rows, then least-recently-used ones, until under 90% of the budget."""
+        if self.size <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+            self.size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            while self.size > target:
+                rows = self._conn.execute(
+                    "SELECT ns, key, size FROM cache ORDER BY accessed LIMIT 256").fetchall()
+                if not rows:
+                    break
+                self._conn.executemany("DELETE FROM cache WHERE ns = ? AND key = ?",
+                                       [(ns, key) for ns, key, _ in rows])
+                self.size -= sum(size for *_, size in rows)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"entries": entries, "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+def geocode_key(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def seed_gazetteer(cache: DiskCache, path=GAZETTEER) -> int:
+    """Pre-populate geocodes for major cities so common lookups never hit the network."""
+    if not Path(path).exists():
+        return 0
+    with open(path, newline="", encoding="utf-8") as f:
+        items = {geocode_key(rec["name"]): {"lat": float(rec["lat"]), "lon": float(rec["lon"]),
+                                             "country": rec["country"]}
+                 for rec in csv.DictReader(f)}
+    return cache.seed("geocode", items)
@@ -0,0 +1,106 @@
+"""
+Geohash cells: encode/decode, neighbours and circle covers.
+
+A geohash is a base-32 string naming a lat/lon rectangle; every extra
+character subdivides it, so all points in a cell share its prefix and a
+prefix range on an indexed column selects a whole cell.
+
+    precision  cell size (at the equator)
+        5      ~4.9 km x 4.9 km
+        6      ~1.2 km x 0.6 km
+        7      ~153 m  x 153 m
+"""
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+M_PER_DEG = 111320.0
+
+
+def encode(lat: float, lon: float, precision: int = 7) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    out, bits, ch, even = [], 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch, lon_lo = ch << 1 | 1, mid
+            else:
+                ch, lon_hi = ch << 1, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch, lat_lo = ch << 1 | 1, mid
+            else:
+                ch, lat_hi = ch << 1, mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(out)
+
+
+def bbox(cell: str):
+    """(lat_lo, lat_hi, lon_lo, lon_hi) of a cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in cell:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = v >> shift & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def decode(cell: str):
+    """Centre (lat, lon) of a cell."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bbox(cell)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def cell_size_m(precision: int, lat: float = 0.0):
+    """(height, width) in metres of cells at this precision and latitude."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    height = 180.0 / 2 ** lat_bits * M_PER_DEG
+    width = 360.0 / 2 ** lon_bits * M_PER_DEG * math.cos(math.radians(lat))
+    return height, width
+
+
+def neighbours(cell: str):
+    """The cell and the 8 around it (fewer at the poles)."""
+    lat_lo, lat_hi, lon_lo, lon_hi = bbox(cell)
+    lat, lon = (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+    dlat, dlon = lat_hi - lat_lo, lon_hi - lon_lo
+    out = []
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            la = lat + i * dlat
+            if not -90 < la < 90:
+                continue
+            lo = (lon + j * dlon + 180) % 360 - 180
+            c = encode(la, lo, len(cell))
+            if c not in out:
+                out.append(c)
+    return out
+
+
+def cover(lat: float, lon: float, radius_m: float, max_precision: int = 7):
+    """
+    Cells (3x3 block at one precision) that together contain every point within
+    radius_m of (lat, lon): the finest precision whose cells are at least radius_m
+    on each side, so the circle can't reach past the neighbours.
+    """
+    precision = 1
+    for p in range(max_precision, 0, -1):
+        if min(cell_size_m(p, lat)) >= radius_m:
+            precision = p
+            break
+    return neighbours(encode(lat, lon, precision))
@@ -0,0 +1,115 @@
+"""
+Geocode pollution reports once at ingest and feed the hotspot grid.
+
+New reports are located on a background pool right after they are saved, so
+the form never waits on a geocoder. Geocodes go through the shared provider
+cache (memory, disk, gazetteer), so a place name is looked up upstream only
+once. Older reports can be back-filled from the command line:
+
+    python -m envsense.hotspots backfill
+    python -m envsense.hotspots top --days 30 --precision 5
+    python -m envsense.hotspots near 19.07 72.87 --radius 5000
+"""
+import logging
+
+from envsense import providers
+from envsense.resilience import UpstreamError
+
+log = logging.getLogger(__name__)
+
+
+def geocode_report(location: str, region: str, owm_key: str):
+    """
+    (lat, lon) for a report's free-text place, most specific query first; None if
+    unknown. Raises UpstreamError if the geocoder fails, rather than guessing.
+    """
+    location, region = (location or "").strip(), (region or "").strip()
+    queries = [f"{location}, {region}" if location and region else "", location, region]
+    for q in dict.fromkeys(q for q in queries if q):
+        geo = providers.geocode_city(q, owm_key)
+        if geo:
+            return geo["lat"], geo["lon"]
+    return None
+
+
+def locate(store, report_id: int, location: str, region: str, owm_key: str) -> bool:
+    """Geocode one report and stamp it into its cell. Returns True if it was placed on the map."""
+    # on any failure the report is left unlocated (cell NULL), so a later backfill retries it;
+    # only a definite "no such place" from the geocoder marks it as not found
+    try:
+        point = geocode_report(location, region, owm_key)
+    except UpstreamError as e:
+        log.warning("geocoding report %s deferred: %s", report_id, e)
+        return False
+    except Exception:
+        log.exception("geocoding report %s failed", report_id)
+        return False
+    store.set_location(report_id, *(point or (None, None)))
+    return point is not None
+
+
+def locate_async(pool, store, report_id: int, location: str, region: str, owm_key: str):
+    return pool.submit(locate, store, report_id, location, region, owm_key)
+
+
+def backfill(store, owm_key: str, batch: int = 500, on_progress=None):
+    """
+    Geocode every report that has never been located. Returns (placed, not placed);
+    reports skipped because the geocoder failed stay unlocated for the next run.
+    """
+    placed = missing = 0
+    seen = set()
+    while True:
+        rows = [r for r in store.unlocated(batch) if r[0] not in seen]
+        if not rows:
+            break
+        for report_id, location, region in rows:
+            seen.add(report_id)
+            if locate(store, report_id, location, region, owm_key):
+                placed += 1
+            else:
+                missing += 1
+        if on_progress:
+            on_progress(placed, missing)
+    return placed, missing
+
+
+def main(argv=None):
+    import argparse
+    from dotenv import load_dotenv
+    from envsense import services
+    from envsense.db import DEFAULT_DB
+    from envsense.reportstore import ReportStore
+    load_dotenv()
+
+    ap = argparse.ArgumentParser(prog="python -m envsense.hotspots",
+                                 description="Geocode pollution reports and query the hotspot grid.")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("backfill", help="geocode reports that have no location yet")
+    top = sub.add_parser("top", help="busiest cells")
+    top.add_argument("--days", type=int, default=30)
+    top.add_argument("--precision", type=int, default=5)
+    top.add_argument("--category")
+    top.add_argument("--limit", type=int, default=20)
+    near = sub.add_parser("near", help="reports near a point")
+    near.add_argument("lat", type=float)
+    near.add_argument("lon", type=float)
+    near.add_argument("--radius", type=float, default=5000, help="metres")
+    args = ap.parse_args(argv)
+
+    store = ReportStore(args.db)
+    if args.command == "backfill":
+        placed, missing = backfill(store, services.owm_key(),
+                                   on_progress=lambda p, m: print(f"placed {p}, not found {m}", flush=True))
+        print(f"done: {placed} report(s) placed, {missing} could not be geocoded")
+    elif args.command == "top":
+        for cell, lat, lon, n in store.hotspots(args.precision, args.days, args.category, args.limit):
+            print(f"{cell:<8}{lat:>10.4f}{lon:>10.4f}{n:>8}")
+    else:
+        for row in store.near(args.lat, args.lon, args.radius):
+            print(f"{row[-1]:>8.0f} m  {row[1]}  {row[5]:<16} {row[3]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Content-addressed store for pollution report photos.
+
+Uploads are streamed to disk in chunks while being hashed, then filed as
+``<root>/<aa>/<sha256>.<ext>`` so the same photo uploaded twice (or two
+different photos sharing a client filename) never collide. Thumbnail and
+downscaled variants are produced by a small background pool so the submit
+response does not wait on image work.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from envsense import metrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ROOT = os.getenv("ENVSENSE_IMAGE_DIR", "pollution_images")
+CHUNK = 1024 * 1024
+ALLOWED_EXT = {".png", ".jpg", ".jpeg"}
+# longest edge in px; variants are always JPEG
+VARIANTS = {"thumb": 256, "medium": 1280}
+
+
+class ImageStore:
+    def __init__(self, root=DEFAULT_ROOT, workers: int = 2):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="envsense-thumbs")
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    @metrics.timed("envsense_storage_seconds", store="image", op="save")
+    def save(self, fileobj, original_name: str) -> str:
+        """Stream an upload to disk; returns its key (``aa/<sha256>.ext``). Variants build in the background."""
+        ext = Path(original_name).suffix.lower()
+        if ext not in ALLOWED_EXT:
+            raise ValueError(f"unsupported image type: {ext or original_name}")
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := fileobj.read(CHUNK):
+                    digest.update(chunk)
+                    out.write(chunk)
+            h = digest.hexdigest()
+            key = f"{h[:2]}/{h}{'.jpg' if ext == '.jpeg' else ext}"
+            dest = self.root / key
+            if dest.exists():
+                os.unlink(tmp)          # duplicate upload: keep the stored copy
+            else:
+                dest.parent.mkdir(exist_ok=True)
+                os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self.schedule_variants(key)
+        return key
+
+    def path(self, key: str) -> Path:
+        """Full-size file for a key (also resolves legacy plain filenames)."""
+        return self.root / key
+
+    def variant_path(self, key: str, variant: str) -> Path:
+        return self.root / "variants" / variant / (Path(key).stem + ".jpg")
+
+    @metrics.timed("envsense_storage_seconds", store="image", op="thumbnail")
+    def thumbnail(self, key: str, variant: str = "thumb"):
+        """Path of a ready variant, or None (scheduling it) if not built yet."""
+        p = self.variant_path(key, variant)
+        if p.exists():
+            return p
+        if self.path(key).exists():
+            self.schedule_variants(key)
+        return None
+
+    def schedule_variants(self, key: str) -> None:
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._pool.submit(self._build_variants, key)
+
+    def _build_variants(self, key: str) -> None:
+        try:
+            todo = {v: px for v, px in VARIANTS.items() if not self.variant_path(key, v).exists()}
+            if not todo:
+                return
+            with Image.open(self.path(key)) as img:
+                # let the JPEG decoder downscale while decoding when it can
+                img.draft("RGB", (max(todo.values()),) * 2)
+                img = ImageOps.exif_transpose(img).convert("RGB")
+                for variant, px in sorted(todo.items(), key=lambda kv: -kv[1]):
+                    img.thumbnail((px, px))
+                    out = self.variant_path(key, variant)
+                    out.parent.mkdir(parents=True, exist_ok=True)
+                    tmp = out.with_name(f".{out.name}.tmp")
+                    img.save(tmp, format="JPEG", quality=82, optimize=True)
+                    os.replace(tmp, out)
+        except Exception:
+            log.exception("could not build variants for %s", key)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
@@ -0,0 +1,256 @@
+"""
+In-process metrics: latency histograms, counters and scrape-time collectors.
+
+Cheap enough to leave on: a timed call costs two ``perf_counter()`` reads, a
+bisect and one uncontended lock. Series are resolved when a function is
+decorated, not per call. Cache and upstream figures that their owners
+already keep are read only when someone scrapes, through collectors.
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="add")
+    def add(...): ...
+
+    with metrics.timed("envsense_page_render_seconds", page="tracker"):
+        ...
+
+``render()`` produces the Prometheus text format. ``serve(port)`` exposes it
+at ``/metrics`` from a daemon thread; the app starts it when
+``ENVSENSE_METRICS_PORT`` is set.
+"""
+import bisect
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+# seconds; spans a warm cache hit to an upstream call that burns its whole retry budget
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "envsense_function_seconds": "Latency of instrumented hot-path functions.",
+    "envsense_page_render_seconds": "Time to execute one page script run.",
+    "envsense_storage_seconds": "Latency of local storage operations (SQLite, Parquet, image files).",
+    "envsense_upstream_request_seconds": "Latency of individual upstream HTTP attempts.",
+    "envsense_upstream_errors_total": "Upstream failures by kind.",
+    "envsense_cache_events_total": "Cache lookups by result.",
+    "envsense_cache_entries": "Entries currently held by a cache.",
+    "envsense_cache_bytes": "Bytes currently held by a cache.",
+    "envsense_upstream_circuit_open": "1 while an upstream's circuit breaker is open or half-open.",
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _fmt_labels(key, extra=()):
+    items = [*key, *extra]
+    if not items:
+        return ""
+    esc = lambda v: str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def _fmt_value(v) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        """(cumulative bucket counts, sum, count), consistent with each other."""
+        with self._lock:
+            counts, total, n = list(self.counts), self.sum, self.count
+        cumulative, running = [], 0
+        for c in counts:
+            running += c
+            cumulative.append(running)
+        return cumulative, total, n
+
+    def quantile(self, q: float):
+        """Estimate from the buckets by linear interpolation, as Prometheus' histogram_quantile does."""
+        cumulative, _, n = self.snapshot()
+        if not n:
+            return None
+        rank = q * n
+        lower, prev = 0.0, 0
+        for upper, cum in zip((*self.buckets, float("inf")), cumulative):
+            if cum >= rank:
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * ((rank - prev) / max(cum - prev, 1))
+            lower, prev = upper, cum
+        return lower
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _Timer:
+    """Times a block (``with``) or every call of a function (decorator) into one histogram."""
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self._t0)
+        return False
+
+    def __call__(self, fn):
+        hist = self.hist
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - t0)
+        return wrapper
+
+
+class Registry:
+    def __init__(self):
+        self._hists = {}        # name -> {label key: Histogram}
+        self._counters = {}     # name -> {label key: Counter}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._hists.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            return hist
+
+    def counter(self, name: str, **labels) -> Counter:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            c = series.get(key)
+            if c is None:
+                c = series[key] = Counter()
+            return c
+
+    def timed(self, name: str, **labels) -> _Timer:
+        return _Timer(self.histogram(name, **labels))
+
+    def inc(self, name: str, amount=1, **labels) -> None:
+        self.counter(name, **labels).inc(amount)
+
+    def collector(self, fn):
+        """Register fn() -> iterable of (name, "counter"|"gauge", labels dict, value), read at scrape time."""
+        with self._lock:
+            self._collectors.append(fn)
+        return fn
+
+    def _collected(self):
+        out = {}
+        for fn in list(self._collectors):
+            try:
+                for name, kind, labels, value in fn():
+                    out.setdefault((name, kind), []).append((_label_key(labels), value))
+            except Exception:
+                log.exception("metrics collector %s failed", getattr(fn, "__name__", fn))
+        return out
+
+    def histograms(self):
+        """{name: {label key: Histogram}} — a shallow copy safe to iterate."""
+        with self._lock:
+            return {name: dict(series) for name, series in self._hists.items()}
+
+    def samples(self):
+        """[(name, kind, label key, value)] for every counter and collected value."""
+        with self._lock:
+            counters = [(name, "counter", key, c.value)
+                        for name, series in self._counters.items() for key, c in series.items()]
+        collected = [(name, kind, key, value)
+                     for (name, kind), rows in self._collected().items() for key, value in rows]
+        return counters + collected
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+
+        def header(name, kind):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for name, series in sorted(self.histograms().items()):
+            header(name, "histogram")
+            for key, hist in sorted(series.items()):
+                cumulative, total, n = hist.snapshot()
+                for upper, cum in zip((*hist.buckets, float("inf")), cumulative):
+                    lines.append(f"{name}_bucket{_fmt_labels(key, [('le', _fmt_value(upper))])} {cum}")
+                lines.append(f"{name}_sum{_fmt_labels(key)} {total!r}")
+                lines.append(f"{name}_count{_fmt_labels(key)} {n}")
+
+        grouped = {}
+        for name, kind, key, value in self.samples():
+            grouped.setdefault((name, kind), []).append((key, value))
+        for (name, kind), rows in sorted(grouped.items()):
+            header(name, kind)
+            for key, value in sorted(rows):
+                lines.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+histogram = REGISTRY.histogram
+timed = REGISTRY.timed
+inc = REGISTRY.inc
+collector = REGISTRY.collector
+render = REGISTRY.render
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int, addr: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread; returns the server (``.shutdown()`` to stop)."""
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="envsense-metrics", daemon=True).start()
+    log.info("metrics on http://%s:%d/metrics", addr, server.server_address[1])
+    return server
@@ -0,0 +1,23 @@
+"""
+One module per sidebar page, each exposing ``render()``.
+
+The router imports only the selected page, so a session that never opens the
+scoreboard never pays for Pillow, and a rerun re-executes just ``render()`` —
+module-level helpers and caches are built once per process.
+"""
+import importlib
+
+from envsense import metrics
+
+PAGES = {
+    "🌫️ Air Quality Tracker": "envsense.pages.tracker",
+    "🌱 Eco Scoreboard": "envsense.pages.scoreboard",
+    "📢 Report Pollution": "envsense.pages.reports",
+    "🩺 Diagnostics": "envsense.pages.diagnostics",
+}
+
+
+def render(title: str):
+    module = PAGES[title]
+    with metrics.timed("envsense_page_render_seconds", page=module.rsplit(".", 1)[-1]):
+        importlib.import_module(module).render()
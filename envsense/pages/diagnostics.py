@@ -0,0 +1,96 @@
+"""🩺 Diagnostics (admin): latency histograms, cache hit rates, upstream errors and storage timings."""
+import os
+
+import pandas as pd
+import streamlit as st
+
+from envsense import metrics, providers, services
+
+SECTIONS = {
+    "envsense_function_seconds": "⏱️ Hot-path functions",
+    "envsense_upstream_request_seconds": "🌐 Upstream HTTP attempts",
+    "envsense_storage_seconds": "💾 Storage I/O",
+    "envsense_page_render_seconds": "📄 Page script runs",
+}
+
+
+def latency_table(series: dict) -> pd.DataFrame:
+    rows = []
+    for key, hist in sorted(series.items()):
+        _, total, n = hist.snapshot()
+        if not n:
+            continue
+        q = {p: hist.quantile(p / 100) for p in (50, 95, 99)}
+        rows.append({**dict(key), "Calls": n, "Mean ms": 1000 * total / n,
+                     **{f"p{p} ms": 1000 * v for p, v in q.items()}, "Total s": total})
+    return pd.DataFrame(rows).round(2)
+
+
+def sample_frame(name: str) -> pd.DataFrame:
+    rows = [{**dict(key), "value": value} for n, _, key, value in metrics.REGISTRY.samples() if n == name]
+    return pd.DataFrame(rows)
+
+
+def cache_table() -> pd.DataFrame:
+    events = sample_frame("envsense_cache_events_total")
+    if events.empty:
+        return events
+    table = events.pivot_table(index="cache", columns="result", values="value", aggfunc="sum", fill_value=0)
+    served = table.drop(columns=["misses"], errors="ignore").sum(axis=1)
+    total = served + table.get("misses", 0)
+    table["hit ratio"] = (served / total.where(total > 0)).round(3)
+    for gauge, col in (("envsense_cache_entries", "entries"), ("envsense_cache_bytes", "bytes")):
+        g = sample_frame(gauge)
+        if not g.empty:
+            table[col] = g.set_index("cache")["value"]
+    return table
+
+
+def upstream_table() -> pd.DataFrame:
+    health = pd.DataFrame(providers.upstream_health()).T
+    errors = sample_frame("envsense_upstream_errors_total")
+    if not errors.empty:
+        by_kind = errors.pivot_table(index="upstream", columns="kind", values="value", aggfunc="sum", fill_value=0)
+        health = health.join(by_kind, how="left").fillna(0)
+    health["error rate"] = (health["failures"].astype(float) / health["calls"].where(health["calls"] > 0)).round(3)
+    return health
+
+
+def render():
+    st.title("🩺 Diagnostics")
+    if st.text_input("Enter admin password", type="password") != services.admin_password():
+        st.info("🔐 Admin only.")
+        return
+
+    server = services.metrics_server()
+    if server:
+        st.caption(f"📡 Prometheus endpoint: `:{server.server_address[1]}/metrics`")
+    elif os.getenv("ENVSENSE_METRICS_PORT"):
+        st.caption(f"⚠️ Couldn't serve `/metrics` on port `{os.getenv('ENVSENSE_METRICS_PORT')}` — see the app log.")
+    else:
+        st.caption("📡 Set `ENVSENSE_METRICS_PORT` to expose these numbers at `/metrics` for Prometheus.")
+    st.caption("Counters are per process and reset when the app restarts.")
+
+    hists = metrics.REGISTRY.histograms()
+    for name, title in SECTIONS.items():
+        table = latency_table(hists.get(name, {}))
+        st.subheader(title)
+        if table.empty:
+            st.caption("No calls recorded yet.")
+        else:
+            st.dataframe(table, hide_index=True)
+
+    st.subheader("🗃️ Caches")
+    caches = cache_table()
+    if caches.empty:
+        st.caption("No cache activity yet.")
+    else:
+        st.dataframe(caches)
+
+    st.subheader("🚦 Upstreams")
+    st.dataframe(upstream_table())
+
+    text = metrics.render()
+    with st.expander("Raw Prometheus exposition"):
+        st.code(text, language="text")
+    st.download_button("📥 Download metrics.txt", text, "metrics.txt", "text/plain")
@@ -0,0 +1,174 @@
+"""📢 Report Pollution: public report form plus the password-protected admin explorer."""
+import io
+import math
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from envsense import hotspots, providers, services
+from envsense.reportstore import CSV_COLUMNS
+from envsense.resilience import UpstreamError
+
+REPORTS_PER_PAGE = 50
+HOTSPOT_WINDOWS = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90, "Last year": 365}
+HOTSPOT_GRIDS = {"~5 km cells": 5, "~1 km cells": 6}
+HOTSPOT_MAX_RADIUS_M = {5: 2500, 6: 600}
+
+
+def render():
+    st.title("📢 Report Pollution Concern")
+    st.write("Help us track environmental pollution issues by reporting what you observe in your area. 🌍")
+
+    with st.form("pollution_form"):
+        name = st.text_input("👤 Your Name (Optional)")
+        location = st.text_input("📍 Location of Incident", placeholder="e.g., Andheri East, Mumbai")
+        region = st.text_input("🌐 Region", placeholder="e.g., Maharashtra")
+        category = st.selectbox("🚨 Type of Issue", ["Air Pollution", "Water Pollution", "Waste Dumping", "Noise", "Others"])
+        description = st.text_area("📝 Describe the Issue", placeholder="e.g., Burning of garbage, chemical smell in air")
+
+        uploaded_image = st.file_uploader("📸 Upload Image (Optional)", type=["png", "jpg", "jpeg"])
+
+        submitted = st.form_submit_button("🚀 Submit Report")
+
+        if submitted:
+            # content-addressed key, so same-named uploads never overwrite each other
+            image_key = services.image_store().save(uploaded_image, uploaded_image.name) if uploaded_image else "None"
+
+            report_data = {
+                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "Name": name,
+                "Location": location,
+                "Region": region,
+                "Category": category,
+                "Description": description,
+                "Image Filename": image_key
+            }
+
+            report_id = services.report_store().add(report_data)
+            # placed on the hotspot grid in the background; the form never waits on the geocoder
+            hotspots.locate_async(services.fetch_pool(), services.report_store(), report_id,
+                                  location, region, services.owm_key())
+
+            st.success("✅ Your pollution report has been submitted.")
+            st.info("💚 Thank you for taking action for a cleaner planet!")
+
+    with st.expander("🔐 Admin Access"):
+        admin_pass = st.text_input("Enter admin password", type="password")
+
+        if admin_pass == services.admin_password():
+            st.success("🔓 Access Granted")
+
+            store = services.report_store()
+            f1, f2, f3 = st.columns(3)
+            category_f = f1.selectbox("Category", ["All", *store.distinct("category")])
+            region_f = f2.selectbox("Region", ["All", *store.distinct("region")])
+            span = f3.date_input("Date range", value=())
+            filters = {
+                "category": None if category_f == "All" else category_f,
+                "region": None if region_f == "All" else region_f,
+                "start": f"{span[0]} 00:00:00" if len(span) > 0 else None,
+                "end": f"{span[-1]} 23:59:59" if len(span) > 0 else None,
+            }
+
+            # keyset pagination: a stack of "before id" cursors, reset whenever the filters change
+            sig = repr(sorted(filters.items()))
+            if st.session_state.get("report_filter_sig") != sig:
+                st.session_state.report_filter_sig = sig
+                st.session_state.report_cursors = [None]
+            cursors = st.session_state.report_cursors
+
+            rows = store.page(limit=REPORTS_PER_PAGE, before_id=cursors[-1], **filters)
+            total = store.count(**filters)
+            if total:
+                df_reports = pd.DataFrame([r[1:] for r in rows], columns=CSV_COLUMNS)
+                st.dataframe(df_reports, hide_index=True)
+
+                c_prev, c_info, c_next = st.columns([1, 2, 1])
+                if c_prev.button("⬅️ Newer", disabled=len(cursors) == 1):
+                    cursors.pop(); st.rerun()
+                c_info.caption(f"Page {len(cursors)} of {math.ceil(total / REPORTS_PER_PAGE)} · "
+                               f"{total} matching report(s)")
+                if c_next.button("Older ➡️", disabled=len(rows) < REPORTS_PER_PAGE):
+                    cursors.append(rows[-1][0]); st.rerun()
+
+                def export_reports():
+                    # rows stream from SQLite into a temp file; nothing is built up in memory
+                    tmp = tempfile.TemporaryFile()
+                    text = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+                    store.export_csv(text, **filters)
+                    text.flush(); text.detach(); tmp.seek(0)
+                    return tmp
+
+                st.download_button("📥 Download Reports as CSV", export_reports,
+                                   "pollution_reports.csv", "text/csv", on_click="ignore")
+
+                # thumbnails only; full-size photos are never loaded here
+                recent = df_reports[df_reports["Image Filename"].fillna("None") != "None"].head(24)
+                if not recent.empty:
+                    st.subheader("🖼️ Photos on this page")
+                    thumbs = [(services.image_store().thumbnail(k), f"{loc} · {ts}") for k, loc, ts in
+                              zip(recent["Image Filename"], recent["Location"], recent["Timestamp"])]
+                    ready = [(str(p), c) for p, c in thumbs if p]
+                    if ready:
+                        st.image([p for p, _ in ready], caption=[c for _, c in ready], width=160)
+                    if len(ready) < len(thumbs):
+                        st.caption(f"⏳ {len(thumbs) - len(ready)} thumbnail(s) still being generated.")
+            elif any(filters.values()):
+                st.info("🔎 No reports match these filters.")
+            else:
+                st.warning("📂 No reports submitted yet.")
+
+            render_hotspots(store, filters["category"])
+            render_near_station(store)
+        elif admin_pass:
+            st.error("❌ Incorrect password")
+
+
+def render_hotspots(store, category):
+    st.subheader("🗺️ Hotspots")
+    c1, c2 = st.columns(2)
+    days = HOTSPOT_WINDOWS[c1.selectbox("Window", list(HOTSPOT_WINDOWS), index=1)]
+    precision = HOTSPOT_GRIDS[c2.selectbox("Grid", list(HOTSPOT_GRIDS))]
+    if store.unlocated(1) and st.button("📍 Locate older reports"):
+        with st.spinner("Geocoding reports submitted before the map existed..."):
+            placed, missing = hotspots.backfill(store, services.owm_key())
+        st.caption(f"Placed {placed} report(s); {missing} couldn't be geocoded.")
+    cells = store.hotspots(precision, days, category)
+    if not cells:
+        st.caption("No geocoded reports in this window yet.")
+        return
+    df = pd.DataFrame(cells, columns=["Cell", "lat", "lon", "Reports"])
+    # marker radius (metres) grows with the square root of the count, so busy cells don't swamp the map
+    df["size"] = HOTSPOT_MAX_RADIUS_M[precision] * (df["Reports"] / df["Reports"].max()) ** 0.5
+    st.map(df, latitude="lat", longitude="lon", size="size")
+    top = df.head(10).copy()
+    top["By category"] = [", ".join(f"{k}: {v}" for k, v in store.cell_breakdown(c, days).items())
+                          for c in top["Cell"]]
+    st.dataframe(top[["Cell", "Reports", "By category", "lat", "lon"]].round(4), hide_index=True)
+
+
+def render_near_station(store):
+    st.subheader("📡 Reports near an AQI station")
+    c1, c2 = st.columns([3, 1])
+    place = c1.text_input("City or area", placeholder="e.g., Kurla, Mumbai")
+    radius_km = c2.number_input("Radius (km)", min_value=1, max_value=50, value=5)
+    if not place:
+        return
+    try:
+        geo = providers.geocode_city(place, services.owm_key())
+    except UpstreamError:
+        st.warning("⚠️ Location search is unavailable right now. Please try again in a minute."); return
+    if not geo:
+        st.warning("⚠️ Couldn't find that place."); return
+    station = providers.nearest_station(geo["lat"], geo["lon"])
+    lat, lon = (station["lat"], station["lon"]) if station else (geo["lat"], geo["lon"])
+    rows = store.near(lat, lon, radius_km * 1000, limit=200)
+    label = station["name"] if station else place.title()
+    st.caption(f"{len(rows)} report(s) within {radius_km} km of {label}")
+    if rows:
+        df = pd.DataFrame([r[1:-1] for r in rows], columns=CSV_COLUMNS)
+        df.insert(0, "Distance km", [round(r[-1] / 1000, 2) for r in rows])
+        st.dataframe(df, hide_index=True)
+
@@ -0,0 +1,203 @@
+"""🌱 Eco Scoreboard: daily green actions, badges, streaks and leaderboards."""
+import contextlib
+import os
+import tempfile
+import threading
+import weakref
+from datetime import datetime
+
+import pandas as pd
+import requests
+import streamlit as st
+
+from envsense import metrics, services
+from envsense.badges import create_badge_image, get_badge
+from envsense.bulkbadges import generate, monthly_winners
+from envsense.scorestore import month_key, week_key
+
+
+_lookup = threading.local()
+
+
+# leaderboard (rollups are maintained at submit time; badges only recomputed on change)
+@st.cache_data(max_entries=16, show_spinner=False)
+def _leaderboard(period: str, bucket: str, version: int):
+    _lookup.missed = True
+    board = pd.DataFrame(services.score_store().top(period, bucket, limit=10), columns=["User", "Total Score"])
+    board["Badge"] = board["Total Score"].apply(get_badge)
+    return board
+
+
+def leaderboard(period: str, bucket: str, version: int):
+    """Cached leaderboard; counts st.cache_data hits and misses for the diagnostics page."""
+    _lookup.missed = False
+    board = _leaderboard(period, bucket, version)
+    metrics.inc("envsense_cache_events_total", cache="leaderboard",
+                result="misses" if _lookup.missed else "hits")
+    return board
+
+
+def render():
+    st.title("🌱 Eco Scoreboard")
+    st.markdown("Track your eco actions, earn badges, and inspire others 🌍")
+
+    st.subheader("👤 Enter Your Details")
+    name  = st.text_input("Your Name (public)", placeholder="e.g., Priya Sharma")
+    email = st.text_input("Your Email (private; used to prevent duplicates)", placeholder="you@example.com")
+
+    # storage
+    store = services.score_store()
+    today_str = datetime.now().strftime("%Y-%m-%d")
+
+    if name and email:
+        # prevent duplicate same-day submissions for same email
+        already_submitted = store.has_submitted(email, today_str)
+
+        if already_submitted:
+            st.warning("⚠️ You’ve already submitted your eco actions today. Come back tomorrow.")
+            with st.expander("✏️ Update your display name"):
+                new_name = st.text_input("New name")
+                if st.button("🔄 Update Name"):
+                    store.rename(email, new_name)
+                    st.success(f"✅ Name updated to: **{new_name}**")
+        else:
+            st.subheader("🌿 What green actions did you take today?")
+            actions = {
+                "🌳 Planted a tree or sapling": 30,
+                "🚶 Walked or cycled instead of driving": 10,
+                "♻️ Segregated your waste properly": 10,
+                "💧 Saved water consciously": 10,
+                "🔌 Turned off unused appliances": 5,
+                "📱 Reduced screen time": 5,
+                "🛍️ Used reusable bags": 10,
+                "🍲 Avoided food waste": 10,
+                "❄️ Kept AC ≤ 25°C or used fan": 5,
+                "🧼 Used eco-friendly/homemade cleaners": 5,
+            }
+
+            selected, total_score = [], 0
+            c1, c2 = st.columns(2)
+            items = list(actions.items())
+            for i, (label, pts) in enumerate(items):
+                with (c1 if i % 2 == 0 else c2):
+                    if st.checkbox(label):
+                        selected.append(label); total_score += pts
+
+            if st.button("🎯 Submit My Score"):
+                if not selected:
+                    st.warning("⚠️ Please select at least one action before submitting.")
+                elif not store.add(name, email, today_str, total_score, ", ".join(selected)):
+                    # lost a race with another tab; the unique (email, date) index rejected it
+                    st.warning("⚠️ You’ve already submitted your eco actions today. Come back tomorrow.")
+                else:
+                    st.success(f"🎉 {name}, you scored **{total_score}** eco-points today!")
+
+                    # small impact metrics
+                    co2_saved = round(total_score * 0.2, 1)    # kg CO2
+                    water_saved = round(total_score * 5)       # liters
+                    m1, m2 = st.columns(2)
+                    m1.metric("🌱 CO₂ Saved", f"{co2_saved} kg")
+                    m2.metric("🚿 Water Saved", f"{water_saved} L")
+                    st.caption("📎 *Estimates based on average lifestyle impacts; actual savings vary.*")
+
+                    # badge
+                    badge_title = get_badge(total_score)
+                    st.success(f"🏅 You’ve earned the badge: **{badge_title}**")
+
+                    # colorful badge image + download
+                    theme = st.selectbox("🎨 Badge Theme", ["Leaf", "Ocean", "Sunrise"], index=0)
+                    badge_symbol = st.selectbox("🏅 Badge Symbol", ["🎖️", "🏆", "🌿", "💚", "✨"], index=0)
+
+                    png_bytes = create_badge_image(name, badge_title, total_score,
+                                                   theme=theme, badge_emoji=badge_symbol)
+                    st.image(png_bytes, caption="Your Eco Badge", use_container_width=True)
+                    st.download_button(
+                        "📥 Download Badge as PNG",
+                        data=png_bytes,
+                        file_name=f"{name or 'eco'}_badge.png",
+                        mime="image/png"
+                    )
+
+                    # share links (message only; link is your site)
+                    st.markdown("#### 📤 Share Your Achievement")
+                    share_text = f"{name} scored {total_score} eco-points and earned the badge ‘{badge_title}’ 🌿 via EnvSense Pro!"
+                    encoded = requests.utils.quote(share_text)
+                    st.markdown(
+                        f"- [💬 WhatsApp](https://wa.me/?text={encoded})\n"
+                        f"- [📘 Facebook](https://www.facebook.com/sharer/sharer.php?u=https://yourwebsite.com&quote={encoded})\n"
+                        f"- [🔗 LinkedIn](https://www.linkedin.com/sharing/share-offsite/?url=https://yourwebsite.com)\n"
+                        f"- 📸 For Instagram Stories: share the downloaded badge image."
+                    )
+
+        # history & streak (per email)
+        streak = store.streak(email, today_str)
+        if streak:
+            st.info(f"🔥 {name}, you’re on a **{streak['current']}**-day streak "
+                    f"(best: {streak['longest']}) and have submitted on "
+                    f"**{streak['active_days']}** day(s)! Keep the streak going!")
+            history = store.user_history(email)
+            st.subheader("📅 Your Eco History")
+            hist = pd.DataFrame(history, columns=["Date", "Score"]).set_index("Date")["Score"]
+            st.line_chart(hist)
+
+    st.subheader("🏆 Top Eco Heroes")
+    tab_m, tab_w = st.tabs(["This Month", "This Week"])
+    for tab, period, bucket, label in (
+        (tab_m, "month", month_key(today_str), "month"),
+        (tab_w, "week", week_key(today_str), "week"),
+    ):
+        with tab:
+            board = leaderboard(period, bucket, store.version)
+            if not board.empty:
+                st.dataframe(board)
+            elif not store.is_empty():
+                st.info(f"No submissions yet this {label}. Be the first!")
+            else:
+                st.info("No data yet. Be the first to submit your actions!")
+
+    with st.expander("🔐 Month-end badges (admin)"):
+        if st.text_input("Enter admin password", type="password", key="bulk_badge_pass") == services.admin_password():
+            render_bulk_badges(store, month_key(today_str))
+
+
+def _unlink(path):
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+class _TempZip:
+    """A generated ZIP on disk, deleted when replaced, when its session is dropped, or at exit."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.remove = weakref.finalize(self, _unlink, path)
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def render_bulk_badges(store, default_month: str):
+    month = st.text_input("Month (YYYY-MM)", value=default_month)
+    winners = monthly_winners(store, month)
+    st.caption(f"{len(winners)} user(s) on the {month} leaderboard.")
+    if winners and st.button("🖨️ Generate badges for everyone"):
+        bar = st.progress(0.0, text=f"Rendering {len(winners)} badges…")
+        # rendered in worker processes; only the ZIP is written here, straight to disk
+        with tempfile.NamedTemporaryFile(prefix=f"badges-{month}-", suffix=".zip", delete=False) as tmp:
+            zipped = _TempZip(tmp.name)
+            stats = generate(winners, tmp, month,
+                             on_progress=lambda done, total: bar.progress(done / total, text=f"{done}/{total} badges"))
+        bar.empty()
+        old = st.session_state.get("bulk_badges")
+        if old:
+            old[1].remove()
+        st.session_state.bulk_badges = (month, zipped, stats)
+
+    done = st.session_state.get("bulk_badges")
+    if done:
+        month_done, zipped, stats = done
+        st.success(f"✅ {stats['badges']} badges for {month_done} in {stats['seconds']}s "
+                   f"({stats['per_second']}/s on {stats['workers']} worker(s))")
+        st.download_button("📦 Download all badges (ZIP)", zipped.read,
+                           f"eco_badges_{month_done}.zip", "application/zip", on_click="ignore")
@@ -0,0 +1,365 @@
+"""🌫️ Air Quality Tracker: live AQI, pollutants and weather, multi-city batches and local history."""
+import time
+from concurrent.futures import as_completed
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from envsense import cpcb, providers, services
+from envsense.resilience import UpstreamError, queued
+
+# a batch waits its turn for rate-limit tokens rather than dropping cities
+BATCH_QUEUE_SECONDS = 180
+
+
+# ──────────── Helper Functions ─────────────
+def get_cpcb_aqi_info(aqi):
+    if aqi <= 50: return "🟢 Good", "Minimal impact"
+    elif aqi <= 100: return "🟡 Satisfactory", "Minor breathing discomfort"
+    elif aqi <= 200: return "🟠 Moderate", "Discomfort to sensitive groups"
+    elif aqi <= 300: return "🔴 Poor", "Discomfort to most on prolonged exposure"
+    elif aqi <= 400: return "🟣 Very Poor", "Respiratory illness likely"
+    else: return "⚫ Severe", "Serious impact even on healthy people"
+
+
+def gauge_color(aqi):
+    if aqi <= 50: return "#4CAF50"
+    elif aqi <= 100: return "#FFEB3B"
+    elif aqi <= 200: return "#FF9800"
+    elif aqi <= 300: return "#F44336"
+    elif aqi <= 400: return "#9C27B0"
+    else: return "#000000"
+
+
+# ──────────── Shared fetch layer ─────────────
+def submit_timed(pool, fn, args):
+    """Submit fn(*args) to pool; the future resolves to (result or None, seconds)."""
+    def timed():
+        t0 = time.perf_counter()
+        try:
+            res = fn(*args)
+        except Exception:
+            res = None
+        return res, time.perf_counter() - t0
+
+    return pool.submit(timed)
+
+
+def fan_out(calls):
+    """Run {label: (fn, args)} in parallel; yield (label, result, seconds) as each finishes."""
+    futures = {submit_timed(services.fetch_pool(), fn, args): label
+               for label, (fn, args) in calls.items()}
+    for fut in as_completed(futures):
+        res, secs = fut.result()
+        yield futures[fut], res, secs
+
+
+# Provider calls are memoised process-wide in envsense.providers (single-flight +
+# stale-while-revalidate), not with st.cache_data, whose expiry makes every session miss at once.
+geocode_city = providers.geocode_city
+fetch_weather = providers.fetch_weather
+fetch_waqi = providers.fetch_waqi
+fetch_concentrations = providers.fetch_concentrations   # snaps to the nearest station
+
+
+# Dynamic Advice
+def build_advice(aqi):
+    if aqi <= 50:
+        return "Enjoy the fresh air! Perfect for outdoor activities."
+    elif aqi <= 100:
+        return "Air is satisfactory. Sensitive people should stay alert."
+    elif aqi <= 200:
+        return "Limit outdoor activity; wear a mask if sensitive."
+    elif aqi <= 300:
+        return "Avoid outdoor exercise. Keep windows closed."
+    elif aqi <= 400:
+        return "Stay indoors; wear N95 if you must go out."
+    else:
+        return "Avoid outdoor activity completely. Use air purifier."
+
+
+def render_waqi(waqi, location, note=None):
+    if not waqi or not str(waqi.get("aqi", "")).isdigit():
+        st.error("⚠️ WAQI data unavailable.")
+        return
+    aqi = int(waqi["aqi"])
+    band, health = get_cpcb_aqi_info(aqi)
+
+    st.subheader(f"📊 {location.title()} — AQI {aqi} ({band})")
+    if note:
+        st.caption(note)
+    st.markdown(f"**🧠 Health Impact:** {health}")
+    st.info(f"💡 {build_advice(aqi)}")
+
+    color = gauge_color(aqi)
+    st.markdown(
+        f"""
+        <div style="background:linear-gradient(to right,green,yellow,orange,red,purple,black);
+        height:15px;border-radius:10px;position:relative;">
+        <div style="position:absolute;left:{min(aqi,500)/5}%;width:2px;height:20px;
+        background-color:{color};"></div></div>""",
+        unsafe_allow_html=True)
+
+
+def render_concentrations(result):
+    concs, station, last = result or (None, None, None)
+    if concs:
+        st.subheader("🧪 Pollutants (µg/m³)")
+        st.caption(f"Station: {station or 'nearest'} · Updated: {last or 'N/A'}")
+        _, _, sub = cpcb.aqi_from_concentrations(concs, strict=False)
+        for p,v in concs.items():
+            if p not in sub: continue
+            status = "✅ Safe" if sub[p] <= 100 else "⚠️ High"
+            st.write(f"• **{p.upper()}**: {v['value']:.1f} {v['unit']} "
+                     f"(Limit: {cpcb.SAFE_LIMITS[p]:g} · CPCB sub-index {sub[p]}) → {status}")
+    else:
+        st.warning("No pollutant data available from nearby stations.")
+
+
+def render_weather(w):
+    if w and "weather" in w:
+        desc = w["weather"][0]["description"].title()
+        temp = w["main"]["temp"]; hum = w["main"]["humidity"]; wind = w["wind"]["speed"]
+        st.subheader("🌤️ Weather")
+        st.info(f"{desc} · 🌡️temp {temp}°C · 💧humidity {hum}% · 💨wind speed {wind} m/s")
+
+
+def render_history(location, day):
+    history = services.aqi_history()
+    df = history.query(location, day)
+    if not df.empty:
+        df["aqi"] = df["aqi"].fillna(cpcb.aqi(df)["aqi"])
+    if df.empty or df["aqi"].isna().all():
+        st.info(f"📭 No stored readings for {location.title()} on {day:%d %b %Y}. "
+                "Add it to ENVSENSE_POLL_LOCATIONS to start recording history.")
+        return
+    aqi = df["aqi"].dropna()
+    band, health = get_cpcb_aqi_info(aqi.mean())
+    st.subheader(f"🗓️ {location.title()} — {day:%d %b %Y} (avg {band})")
+    st.markdown(f"**🧠 Health Impact:** {health}")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Min AQI", int(aqi.min()))
+    c2.metric("Mean AQI", int(round(aqi.mean())))
+    c3.metric("Max AQI", int(aqi.max()))
+    st.line_chart(df.set_index("ts")["aqi"])
+
+    pols = df[list(providers.POLLUTANTS)].dropna(axis=1, how="all")
+    if not pols.empty:
+        st.subheader("🧪 Pollutants that day (µg/m³)")
+        st.dataframe(pols.agg(["min", "mean", "max"]).T.round(1))
+
+    daily = history.daily_summary(location, day - timedelta(days=29), day)
+    if len(daily) > 1:
+        st.subheader("📈 30-day AQI trend")
+        st.line_chart(daily)
+    st.caption(f"From {len(df)} local snapshot(s) · no upstream call")
+
+
+# ──────────── Multi-city batch ─────────────
+def parse_city_list(text, upload):
+    """Cities from a textarea (lines/commas) and/or a CSV, de-duplicated case-insensitively."""
+    raw = [c for line in (text or "").splitlines() for c in line.split(",")]
+    if upload is not None:
+        df_in = pd.read_csv(upload)
+        col = next((c for c in df_in.columns if c.strip().lower() in ("city", "location", "name")),
+                   df_in.columns[0])
+        raw += df_in[col].dropna().astype(str).tolist()
+    seen, cities = set(), []
+    for c in (c.strip() for c in raw):
+        if c and c.lower() not in seen:
+            seen.add(c.lower()); cities.append(c)
+    return cities
+
+
+def batch_lookup(cities, on_progress=None):
+    """
+    Geocode every city and fetch all three providers with bounded concurrency.
+    Provider calls for a city are queued the moment its geocode lands, so the
+    batch takes roughly one geocode plus the slowest provider call per wave.
+    Calls wait for rate-limit tokens instead of failing, so a batch larger
+    than a provider's burst is paced to its quota rather than truncated.
+    """
+    def patient(fn):
+        def call(*args):
+            with queued(BATCH_QUEUE_SECONDS):
+                return fn(*args)
+        return call
+
+    def geocode(city):
+        try:
+            return geocode_city(city, services.owm_key())
+        except UpstreamError as e:
+            return e                # provider down or over quota, not an unknown city
+
+    pool = services.batch_pool()
+    pending = {submit_timed(pool, patient(geocode), (c,)): ("geo", c) for c in cities}
+    rows = {c: {"City": c} for c in cities}
+    by_coord = {}  # (lat, lon) -> cities sharing it; each point is fetched once
+    done, total = 0, len(cities) * 4
+
+    while pending:
+        fut = next(as_completed(pending))
+        kind, key = pending.pop(fut)
+        res, _ = fut.result()
+        done += 1
+        if kind == "geo":
+            if isinstance(res, UpstreamError):
+                rows[key]["Status"] = "geocoder unavailable"
+                done += 3
+            elif not res:
+                rows[key]["Status"] = "not found"
+                done += 3
+            else:
+                pt = (res["lat"], res["lon"])
+                rows[key].update(Country=res.get("country", ""), Lat=pt[0], Lon=pt[1])
+                if pt in by_coord:
+                    by_coord[pt].append(key); done += 3
+                else:
+                    by_coord[pt] = [key]
+                    for label, fn, args in (("WAQI", fetch_waqi, (*pt, services.waqi_key())),
+                                            ("OpenAQ", fetch_concentrations, pt),
+                                            ("OpenWeather", fetch_weather, (*pt, services.owm_key()))):
+                        pending[submit_timed(pool, patient(fn), args)] = (label, pt)
+        else:
+            for city in by_coord[key]:
+                rows[city].update(_batch_fields(kind, res))
+        if on_progress:
+            on_progress(min(done / total, 1.0))
+
+    # cities that shared a coordinate with an earlier one copy its fields
+    for pt, names in by_coord.items():
+        for city in names[1:]:
+            rows[city].update({k: v for k, v in rows[names[0]].items() if k != "City"})
+
+    df = pd.DataFrame(rows.values())
+    for col in ("AQI", "Band", "Colour", "Status", "Dominant"):
+        if col not in df:
+            df[col] = None
+    # where WAQI had nothing, score the OpenAQ readings locally (one vectorised pass)
+    readings = df.reindex(columns=[p.upper() for p in cpcb.POLLUTANTS]).set_axis(cpcb.POLLUTANTS, axis=1)
+    local = cpcb.aqi(readings)
+    fill = df["AQI"].isna() & local["aqi"].notna()
+    df["AQI source"] = np.where(fill, "CPCB (local)", np.where(df["AQI"].notna(), "WAQI", ""))
+    df.loc[fill, "AQI"] = local.loc[fill, "aqi"]
+    df.loc[fill, "Dominant"] = local.loc[fill, "dominant"]
+    df["AQI"] = pd.to_numeric(df["AQI"]).round().astype("Int64")
+    has_aqi = df["AQI"].notna()
+    df.loc[has_aqi, "Band"] = df.loc[has_aqi, "AQI"].map(lambda a: get_cpcb_aqi_info(a)[0])
+    df.loc[has_aqi, "Colour"] = df.loc[has_aqi, "AQI"].map(gauge_color)
+    df.loc[df["Status"].isna() & has_aqi, "Status"] = "ok"
+    df.loc[df["Status"].isna(), "Status"] = "no AQI"
+    lead = ["City", "Country", "AQI", "Band", "Colour", "Dominant", "AQI source", "Station"]
+    return df[[c for c in lead if c in df] + [c for c in df if c not in lead]]
+
+
+def _batch_fields(provider, res):
+    if provider == "WAQI":
+        if not res or not str(res.get("aqi", "")).isdigit():
+            return {}
+        return {"AQI": int(res["aqi"]), "Dominant": res.get("dominentpol")}
+    if provider == "OpenAQ":
+        concs, station, _ = res or (None, None, None)
+        out = {"Station": station}
+        for p in cpcb.POLLUTANTS:
+            if concs and p in concs:
+                out[p.upper()] = cpcb.to_ugm3(p, concs[p]["value"], concs[p].get("unit"))
+        return out
+    if res and "main" in res:
+        return {"Temp °C": res["main"].get("temp"), "Humidity %": res["main"].get("humidity"),
+                "Wind m/s": res.get("wind", {}).get("speed")}
+    return {}
+
+
+def render_batch():
+    st.markdown("Paste one city per line (or comma-separated), or upload a CSV with a `city` column.")
+    text = st.text_area("🏙️ Cities", placeholder="Mumbai\nDelhi\nBengaluru")
+    upload = st.file_uploader("📄 Cities CSV (optional)", type=["csv"])
+    if not st.button("🔍 Fetch all"):
+        return
+    cities = parse_city_list(text, upload)
+    if not cities:
+        st.warning("⚠️ Add at least one city."); return
+
+    bar = st.progress(0.0, text=f"Looking up {len(cities)} cities…")
+    t0 = time.perf_counter()
+    df = batch_lookup(cities, on_progress=lambda f: bar.progress(f))
+    bar.empty()
+
+    styled = df.style.map(lambda c: f"background-color:{c}" if c else "", subset=["Colour"])
+    st.dataframe(styled, hide_index=True)
+    st.caption(f"⏱️ {len(cities)} cities in {time.perf_counter() - t0:.2f}s · "
+               f"{(df['Status'] == 'ok').sum()} with AQI")
+    unplaced = (df["Status"] == "geocoder unavailable").sum()
+    if unplaced:
+        st.caption(f"⚠️ {unplaced} city(ies) couldn't be looked up while OpenWeather was unavailable — fetch again later.")
+    degraded = [name for name, h in providers.upstream_health().items() if h["state"] != "closed"]
+    if degraded:
+        st.caption(f"⚠️ {', '.join(degraded)} currently unavailable — showing the last cached data where we have it.")
+    st.download_button("📥 Download table as CSV", df.to_csv(index=False).encode("utf-8"),
+                       "aqi_batch.csv", "text/csv")
+
+
+def render():
+    st.title("🌫️ EnvSense Pro — Air Quality Tracker")
+    st.markdown("Check live AQI, pollutants, and weather for any city 🌍")
+
+    if st.toggle("🗺️ Multi-city mode"):
+        render_batch()
+        return
+
+    location = st.text_input("📍 Enter city or area", placeholder="e.g., Mumbai")
+    selected_date = st.date_input("📅 Select date", value=date.today(), max_value=date.today())
+
+    if st.button("🔍 Fetch AQI"):
+        if selected_date < date.today():
+            render_history(location, selected_date)
+            return
+        t0 = time.perf_counter()
+        try:
+            geo = geocode_city(location, services.owm_key())
+        except UpstreamError:
+            st.error("⚠️ Location search is unavailable right now. Please try again in a minute."); return
+        latency = {"Geocode": time.perf_counter() - t0}
+        if not geo:
+            st.error("❌ City not found."); return
+        lat, lon = geo["lat"], geo["lon"]
+
+        # one slot per provider keeps the page layout stable while results land out of order
+        slots = {"WAQI": st.empty(), "OpenAQ": st.container(), "OpenWeather": st.container()}
+        renderers = {
+            "WAQI": lambda res: render_waqi(res, location),
+            "OpenAQ": render_concentrations,
+            "OpenWeather": render_weather,
+        }
+        results = {}
+        with st.spinner("Fetching live data…"):
+            for provider, res, secs in fan_out({
+                "WAQI": (fetch_waqi, (lat, lon, services.waqi_key())),
+                "OpenAQ": (fetch_concentrations, (lat, lon)),
+                "OpenWeather": (fetch_weather, (lat, lon, services.owm_key())),
+            }):
+                results[provider], latency[provider] = res, secs
+                with (slots[provider].container() if provider == "WAQI" else slots[provider]):
+                    renderers[provider](res)
+
+        # WAQI down or blank: fill the headline from OpenAQ concentrations with the local CPCB engine
+        waqi_res = results.get("WAQI")
+        concs = (results.get("OpenAQ") or (None,))[0]
+        if not (waqi_res and str(waqi_res.get("aqi", "")).isdigit()) and concs:
+            local_aqi, dominant, _ = cpcb.aqi_from_concentrations(concs)
+            if local_aqi is not None:
+                with slots["WAQI"].container():
+                    render_waqi({"aqi": local_aqi}, location,
+                                note=f"Computed locally from OpenAQ concentrations (CPCB method, "
+                                     f"dominant {dominant.upper()}) — WAQI unavailable.")
+
+        degraded = [name for name, h in providers.upstream_health().items() if h["state"] != "closed"]
+        if degraded:
+            st.caption(f"⚠️ {', '.join(degraded)} currently unavailable — showing the last cached data where we have it.")
+
+        waqi = results.get("WAQI") or {}
+        st.caption(f"Source: WAQI · OpenAQ · OpenWeather · Updated {waqi.get('time') or 'recently'}")
+        st.caption("⏱️ " + " · ".join(f"{k} {v:.2f}s" for k, v in latency.items()))
+        st.caption("[CPCB Dashboard](https://airquality.cpcb.gov.in/AQI_India/)")
@@ -0,0 +1,285 @@
+"""
+Upstream clients for OpenWeather (geocoding + weather), WAQI and OpenAQ.
+
+Plain functions with no Streamlit dependency, so the pages, the snapshot
+poller and scripts share one keep-alive HTTP pool and one disk cache.
+
+Lookups go memory (single-flight + stale-while-revalidate) -> disk -> network,
+so a popular key expiring triggers one upstream call, not one per session.
+Network calls pass through a per-provider ``Upstream`` (rate limit, retries,
+circuit breaker); when one fails, the last value ever cached is served instead.
+``geocode_city`` raises ``UpstreamError`` when there is nothing to fall back
+on, so callers can tell "provider down" from "no such place"; the fetchers
+return None in both cases.
+"""
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from envsense import metrics, replay, stations
+from envsense.coalesce import SWRCache
+from envsense.diskcache import DiskCache, geocode_key, seed_gazetteer
+from envsense.resilience import Upstream, UpstreamError, UpstreamUnavailable, queued
+
+log = logging.getLogger(__name__)
+
+POLLUTANTS = ("pm25", "pm10", "o3", "no2", "so2", "co", "nh3")
+
+_lock = threading.Lock()
+_session = None
+_cache = None
+_stations = None            # (StationIndex or None, is_stale)
+_stations_retry_at = 0.0
+
+# namespace -> (fresh seconds, extra seconds an expired value may be served while refreshing)
+MEMO_TTLS = {
+    "geocode": (24 * 3600, 7 * 24 * 3600),
+    "waqi": (300, 900),
+    "openaq": (600, 1800),
+    "weather": (600, 1800),
+}
+_memo = {ns: SWRCache(ttl, stale) for ns, (ttl, stale) in MEMO_TTLS.items()}
+
+
+def _quota(provider, default):
+    """(tokens/s, burst) from ENVSENSE_RATE_<PROVIDER>="calls/seconds", e.g. "60/60"."""
+    calls, seconds = (float(x) for x in os.getenv(f"ENVSENSE_RATE_{provider.upper()}", default).split("/"))
+    return calls / seconds, max(1.0, calls / 4)
+
+
+# defaults follow the published quotas: OpenWeather free tier 60/min, OpenAQ 60/min, WAQI 1000/s
+UPSTREAMS = {
+    "openweather": Upstream("OpenWeather", *_quota("openweather", "60/60")),
+    "openaq": Upstream("OpenAQ", *_quota("openaq", "60/60")),
+    "waqi": Upstream("WAQI", *_quota("waqi", "1000/1")),
+}
+
+
+# memo namespace -> the upstream its loads go to
+NS_UPSTREAM = {"geocode": "openweather", "weather": "openweather", "waqi": "waqi", "openaq": "openaq"}
+
+
+def _get_json(provider, url, params=None):
+    return UPSTREAMS[provider].get(session(), url, params=params).json()
+
+
+def _cached(ns, key, loader):
+    """loader() through memo and disk; raises UpstreamError if it fails and nothing was ever cached."""
+    # joining someone else's in-flight load waits no longer than our own call could take
+    # (a batch leader may sit in the rate-limit queue far beyond an interactive budget)
+    wait = UPSTREAMS[NS_UPSTREAM[ns]].wait_budget() + 1.0
+    try:
+        return _memo[ns].get(key, lambda: cache().get_or_load(ns, key, loader), wait_timeout=wait)
+    except (UpstreamError, TimeoutError) as e:
+        # provider down or over quota: serve the last value we ever had, without
+        # memoising it as fresh, so the next call tries the provider again
+        fallback = _memo[ns].peek(key) or cache().get(ns, key, allow_expired=True)
+        if fallback is not None:
+            return fallback
+        if isinstance(e, UpstreamError):
+            raise
+        raise UpstreamUnavailable(f"{NS_UPSTREAM[ns]}: still waiting on an earlier request") from e
+
+
+def upstream_health() -> dict:
+    return {u.name: u.health() for u in UPSTREAMS.values()}
+
+
+def memo_stats() -> dict:
+    return {ns: m.stats() for ns, m in _memo.items()}
+
+
+@metrics.collector
+def _collect():
+    for ns, st in memo_stats().items():
+        cache = f"memo:{ns}"
+        for result in ("hits", "stale_hits", "misses", "coalesced"):
+            yield "envsense_cache_events_total", "counter", {"cache": cache, "result": result}, st[result]
+        yield "envsense_cache_entries", "gauge", {"cache": cache}, st["entries"]
+    if _cache is not None:          # never open the cache database just to scrape it
+        st = _cache.stats()
+        for result in ("hits", "misses"):
+            yield "envsense_cache_events_total", "counter", {"cache": "disk", "result": result}, st[result]
+        yield "envsense_cache_entries", "gauge", {"cache": "disk"}, st["entries"]
+        yield "envsense_cache_bytes", "gauge", {"cache": "disk"}, st["bytes"]
+    for name, h in upstream_health().items():
+        yield "envsense_upstream_circuit_open", "gauge", {"upstream": name}, int(h["state"] != "closed")
+
+
+def session() -> requests.Session:
+    """One keep-alive connection pool shared by every provider call in the process."""
+    global _session
+    with _lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            # offline runs / benchmarks: ENVSENSE_REPLAY or ENVSENSE_RECORD swaps the transport
+            replay.install(s, pool_connections=4, pool_maxsize=32)
+            _session = s
+        return _session
+
+
+def cache() -> DiskCache:
+    """Persistent response cache; survives restarts, seeded with major-city geocodes."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = DiskCache()
+            seed_gazetteer(_cache)
+        return _cache
+
+
+def station_index():
+    """
+    Local OpenAQ station index, or None until the first catalogue download lands.
+    A missing or stale catalogue is refreshed on a background thread.
+    """
+    global _stations, _stations_retry_at
+    with _lock:
+        if _stations is None:
+            _stations = stations.load_index()
+        index, stale = _stations
+        if stale and time.time() >= _stations_retry_at:
+            _stations_retry_at = time.time() + 3600
+            threading.Thread(target=_refresh_stations, name="envsense-stations", daemon=True).start()
+    return index
+
+
+def refresh_station_catalogue(path=stations.DEFAULT_PATH, countries=None) -> int:
+    """Download the OpenAQ station catalogue within the OpenAQ quota; raises if any page fails."""
+    # a background job: wait for rate-limit tokens instead of giving up
+    with queued(300):
+        return stations.refresh(session(), POLLUTANTS, path, countries, upstream=UPSTREAMS["openaq"])
+
+
+def _refresh_stations():
+    global _stations
+    try:
+        refresh_station_catalogue(countries=stations.configured_countries())
+        loaded = stations.load_index()
+        with _lock:
+            _stations = loaded
+    except Exception:
+        log.exception("OpenAQ station catalogue refresh failed")
+
+
+def nearest_station(lat, lon, radius_m=40000):
+    """Closest catalogued station within radius_m, resolved offline; None if unknown."""
+    index = station_index()
+    found = index.nearest(lat, lon, k=1, radius_m=radius_m) if index is not None else []
+    return found[0] if found else None
+
+
+def _pt(lat, lon):
+    return f"{float(lat):.4f},{float(lon):.4f}"
+
+
+@metrics.timed("envsense_function_seconds", fn="geocode_city")
+def geocode_city(name, owm_key):
+    """{"lat", "lon", "country"}, or None if the place is unknown; raises UpstreamError if OpenWeather is down."""
+    def load():
+        r = _get_json("openweather", "http://api.openweathermap.org/geo/1.0/direct",
+                      params={"q": name, "limit": 1, "appid": owm_key})
+        if not r: return None
+        return {"lat": r[0]["lat"], "lon": r[0]["lon"], "country": r[0].get("country", "")}
+    return _cached("geocode", geocode_key(name), load)
+
+
+@metrics.timed("envsense_function_seconds", fn="fetch_weather")
+def fetch_weather(lat, lon, key):
+    def load():
+        w = _get_json("openweather", "https://api.openweathermap.org/data/2.5/weather",
+                      params={"lat": lat, "lon": lon, "appid": key, "units": "metric"})
+        return w if "weather" in w else None
+    try:
+        return _cached("weather", _pt(lat, lon), load)
+    except UpstreamError:
+        return None
+    except Exception:
+        log.exception("unexpected provider response")
+        return None
+
+
+@metrics.timed("envsense_function_seconds", fn="fetch_waqi")
+def fetch_waqi(lat, lon, token):
+    def load():
+        r = _get_json("waqi", f"https://api.waqi.info/feed/geo:{lat};{lon}/",
+                      params={"token": token})
+        if r.get("status") != "ok": return None
+        d = r["data"]
+        return {
+            "aqi": d.get("aqi"),
+            "dominentpol": d.get("dominentpol"),
+            "city": d.get("city", {}).get("name"),
+            "time": d.get("time", {}).get("s"),
+            "url": d.get("city", {}).get("url")
+        }
+    try:
+        return _cached("waqi", _pt(lat, lon), load)
+    except UpstreamError:
+        return None
+    except Exception:
+        log.exception("unexpected provider response")
+        return None
+
+
+def _parse_latest(r):
+    if not r.get("results"): return None
+    res = r["results"][0]
+    concs = {m["parameter"]: {"value": m["value"], "unit": m["unit"]}
+             for m in res.get("measurements", [])}
+    return [concs, res.get("location"), res.get("measurements")[0].get("lastUpdated")]
+
+
+@metrics.timed("envsense_function_seconds", fn="fetch_station_latest")
+def fetch_station_latest(station_id):
+    """Latest measurements for one OpenAQ station; cached per station, not per coordinate."""
+    def load():
+        return _parse_latest(_get_json("openaq", f"https://api.openaq.org/v2/latest/{int(station_id)}"))
+    try:
+        return tuple(_cached("openaq", f"station:{int(station_id)}", load)
+                     or (None, None, None))
+    except UpstreamError:
+        return None, None, None
+    except Exception:
+        log.exception("unexpected provider response")
+        return None, None, None
+
+
+@metrics.timed("envsense_function_seconds", fn="fetch_concentrations_radius")
+def fetch_concentrations_radius(lat, lon, radius_m=40000):
+    """Nearest station's latest values via an upstream radius query (no local catalogue)."""
+    def load():
+        return _parse_latest(_get_json("openaq", "https://api.openaq.org/v2/latest",
+            params={
+                "coordinates": f"{lat},{lon}",
+                "radius": radius_m,
+                "parameter": ",".join(POLLUTANTS),
+                "order_by": "distance",
+                "limit": 1,
+            }))
+    try:
+        return tuple(_cached("openaq", f"{_pt(lat, lon)}:{radius_m}", load)
+                     or (None, None, None))
+    except UpstreamError:
+        return None, None, None
+    except Exception:
+        log.exception("unexpected provider response")
+        return None, None, None
+
+
+@metrics.timed("envsense_function_seconds", fn="fetch_concentrations")
+def fetch_concentrations(lat, lon, radius_m=40000):
+    """(concentrations, station name, last updated) for the station nearest to lat/lon."""
+    station = nearest_station(lat, lon, radius_m)
+    if station is not None:
+        result = fetch_station_latest(station["id"])
+        if result[0]:
+            return result
+    return fetch_concentrations_radius(lat, lon, radius_m)
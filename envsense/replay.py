@@ -0,0 +1,184 @@
+"""
+Record/replay transport for the upstream APIs, for offline runs and benchmarks.
+
+``ReplayAdapter`` answers requests from a cassette (a JSON list of recorded
+responses) with optional injected latency and failures; ``RecordingAdapter``
+passes requests through to the network and appends each response to a
+cassette. API keys are scrubbed before anything is written.
+
+Mounted on the shared provider session when configured:
+
+    ENVSENSE_REPLAY=benchmarks/cassettes/providers.json     # serve from a cassette
+    ENVSENSE_REPLAY_LATENCY_MS="80,api.waqi.info=300"       # default, then per host
+    ENVSENSE_REPLAY_FAILURE_RATE="0,api.openaq.org=0.2"     # share of requests that fail
+    ENVSENSE_REPLAY_FAILURE=status                          # status (503) | timeout | error
+    ENVSENSE_RECORD=my_cassette.json                        # record live traffic instead
+
+A request matches a recorded one with the same method, host, path and
+(non-secret) query; failing that, one whose path has the same shape with the
+numbers ignored, so a cassette recorded for one city serves any coordinate.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+SECRET_PARAMS = {"appid", "token", "api_key", "apikey"}
+FAILURE_MODES = ("status", "timeout", "error")
+
+
+def scrub_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(k, "***" if k.lower() in SECRET_PARAMS else v) for k, v in parse_qsl(parts.query)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _keys(method: str, url: str):
+    """(exact key, shape key) for a request; the shape key ignores the query and any numbers in the path."""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query) if k.lower() not in SECRET_PARAMS)
+    shape = re.sub(r"-?\d+(?:\.\d+)?", "#", parts.path)
+    return (method, parts.netloc, parts.path, tuple(query)), (method, parts.netloc, shape)
+
+
+def parse_host_values(spec: str, cast=float) -> dict:
+    """ "80,api.waqi.info=300" -> {None: 80.0, "api.waqi.info": 300.0} (None is the default)."""
+    out = {}
+    for item in (s.strip() for s in (spec or "").split(",")):
+        if not item:
+            continue
+        host, _, value = item.rpartition("=")
+        out[host or None] = cast(value)
+    return out
+
+
+def load_cassette(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _build_response(request, status: int, body, elapsed: float) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp.reason = "OK" if status < 400 else "Service Unavailable"
+    resp._content = (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+    resp.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+    resp.encoding = "utf-8"
+    resp.url = request.url
+    resp.request = request
+    resp.elapsed = timedelta(seconds=elapsed)
+    return resp
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, interactions, latency=None, failure_rate=None, failure: str = "status",
+                 seed: int = None):
+        super().__init__()
+        if failure not in FAILURE_MODES:
+            raise ValueError(f"failure must be one of {FAILURE_MODES}, got {failure!r}")
+        self.latency = {None: 0.0, **(latency or {})}            # host -> seconds
+        self.failure_rate = {None: 0.0, **(failure_rate or {})}  # host -> probability
+        self.failure = failure
+        self.calls = 0
+        self.failures = 0
+        self.unmatched = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._exact, self._shape = {}, {}
+        for it in interactions:
+            exact, shape = _keys(it.get("method", "GET"), it["url"])
+            self._exact[exact] = it
+            self._shape.setdefault(shape, it)
+
+    @classmethod
+    def from_env(cls, path):
+        return cls(load_cassette(path),
+                   latency={h: ms / 1000 for h, ms in
+                            parse_host_values(os.getenv("ENVSENSE_REPLAY_LATENCY_MS")).items()},
+                   failure_rate=parse_host_values(os.getenv("ENVSENSE_REPLAY_FAILURE_RATE")),
+                   failure=os.getenv("ENVSENSE_REPLAY_FAILURE", "status"))
+
+    def _for_host(self, table, host):
+        return table.get(host, table[None])
+
+    def send(self, request, timeout=None, **kwargs):
+        host = urlsplit(request.url).netloc
+        delay = self._for_host(self.latency, host)
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self._for_host(self.failure_rate, host)
+            self.failures += fail
+
+        if fail and self.failure == "timeout":
+            budget = timeout[-1] if isinstance(timeout, tuple) else timeout
+            time.sleep(budget if budget is not None else delay)
+            raise requests.exceptions.ReadTimeout(f"injected timeout for {host}", request=request)
+        if fail and self.failure == "error":
+            raise requests.exceptions.ConnectionError(f"injected connection error for {host}",
+                                                      request=request)
+        time.sleep(delay)
+        if fail:
+            return _build_response(request, 503, {"error": "injected failure"}, delay)
+
+        exact, shape = _keys(request.method, request.url)
+        hit = self._exact.get(exact) or self._shape.get(shape)
+        if hit is None:
+            with self._lock:
+                self.unmatched += 1
+            return _build_response(request, 404, {"error": f"no recording for {scrub_url(request.url)}"}, delay)
+        return _build_response(request, hit.get("status", 200), hit["body"], delay)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "failures": self.failures, "unmatched": self.unmatched}
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Live HTTP adapter that appends every JSON response to a cassette file."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._interactions = load_cassette(self.path) if self.path.exists() else []
+
+    def send(self, request, **kwargs):
+        resp = super().send(request, **kwargs)
+        try:
+            body = resp.json()
+        except ValueError:
+            body = resp.text
+        entry = {"method": request.method, "url": scrub_url(request.url),
+                 "status": resp.status_code, "body": body}
+        with self._lock:
+            self._interactions.append(entry)
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_text(json.dumps(self._interactions, indent=1, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+        return resp
+
+
+def install(session: requests.Session, **adapter_kwargs):
+    """Mount a replay or recording adapter on session if the environment asks for one."""
+    replay, record = os.getenv("ENVSENSE_REPLAY"), os.getenv("ENVSENSE_RECORD")
+    if replay:
+        adapter = ReplayAdapter.from_env(replay)
+    elif record:
+        adapter = RecordingAdapter(record, **adapter_kwargs)
+    else:
+        return None
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return adapter
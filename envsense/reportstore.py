@@ -0,0 +1,297 @@
+"""
+Pollution reports backed by SQLite, with indexed filters and keyset paging.
+
+The admin explorer asks for one page of reports matching Category / Region /
+time range; each filter combination is served by an index and only ``limit``
+rows are materialised. Exports stream rows in batches, so memory stays flat
+regardless of how many reports exist.
+
+Reports are geocoded once after ingest (see envsense.hotspots) and stamped with
+a geohash ``cell``. ``report_cells`` keeps per-cell counts by category and day,
+bumped as each report is located, so hotspot maps read a small aggregate
+instead of scanning reports, and "near here" queries are index range scans
+over a 3x3 block of cells.
+
+    python -m envsense.reportstore migrate pollution_reports.csv
+    python -m envsense.reportstore export  reports.csv [--category Noise]
+"""
+import csv
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+
+from envsense import geohash, metrics, stations
+from envsense.db import DEFAULT_DB, connect
+
+CSV_COLUMNS = ["Timestamp", "Name", "Location", "Region", "Category", "Description", "Image Filename"]
+_DB_COLUMNS = ["ts", "name", "location", "region", "category", "description", "image"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id          INTEGER PRIMARY KEY,
+    ts          TEXT NOT NULL,               -- YYYY-MM-DD HH:MM:SS
+    name        TEXT NOT NULL DEFAULT '',
+    location    TEXT NOT NULL DEFAULT '',
+    region      TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    category    TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    image       TEXT NOT NULL DEFAULT 'None'
+);
+CREATE INDEX IF NOT EXISTS reports_ts ON reports (ts);
+CREATE INDEX IF NOT EXISTS reports_category_ts ON reports (category, ts);
+CREATE INDEX IF NOT EXISTS reports_region_ts ON reports (region, ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS report_cells (
+    cell     TEXT NOT NULL,                  -- geohash at COUNT_PRECISION
+    category TEXT NOT NULL,
+    day      TEXT NOT NULL,                  -- YYYY-MM-DD
+    n        INTEGER NOT NULL,
+    PRIMARY KEY (cell, category, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS report_cells_day ON report_cells (day, cell);
+"""
+# added after the first release; ALTERed into older databases
+_GEO_COLUMNS = {"lat": "REAL", "lon": "REAL", "cell": "TEXT"}   # cell NULL = not geocoded yet, '' = not found
+
+CELL_PRECISION = 7      # stored per report (~150 m)
+COUNT_PRECISION = 6     # aggregated counts (~1 km); coarser maps group by prefix
+
+
+def _where(category=None, region=None, start=None, end=None, before_id=None):
+    """
+    SQL WHERE clause + params for the explorer filters. start/end are inclusive
+    timestamps; a date-only end covers that whole day.
+    """
+    clauses, params = [], []
+    if category:
+        clauses.append("category = ?"); params.append(category)
+    if region:
+        clauses.append("region = ?"); params.append(region)
+    if start:
+        clauses.append("ts >= ?"); params.append(str(start))
+    if end:
+        end = str(end)
+        if len(end) == 10:          # YYYY-MM-DD
+            end += " 23:59:59"
+        clauses.append("ts <= ?"); params.append(end)
+    if before_id is not None:
+        clauses.append("id < ?"); params.append(int(before_id))
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class ReportStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self._conn = connect(self.path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            have = {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}
+            for col, kind in _GEO_COLUMNS.items():
+                if col not in have:
+                    self._conn.execute(f"ALTER TABLE reports ADD COLUMN {col} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS reports_cell ON reports (cell)")
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="add")
+    def add(self, report: dict) -> int:
+        """Insert one report given in CSV column names; returns its id."""
+        values = [str(report.get(c) or "") for c in CSV_COLUMNS]
+        values[-1] = values[-1] or "None"
+        with self._lock, self._conn:
+            return self._conn.execute(
+                f"INSERT INTO reports ({', '.join(_DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values).lastrowid
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="page")
+    def page(self, limit: int = 50, before_id=None, **filters):
+        """
+        Newest-first page of matching reports as (id, *CSV_COLUMNS) tuples.
+        Pass the smallest id of the previous page as ``before_id`` for the next one.
+        """
+        where, params = _where(before_id=before_id, **filters)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT id, {', '.join(_DB_COLUMNS)} FROM reports{where} ORDER BY id DESC LIMIT ?",
+                (*params, int(limit))).fetchall()
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="count")
+    def count(self, **filters) -> int:
+        where, params = _where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM reports{where}", params).fetchone()[0]
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="distinct")
+    def distinct(self, column: str):
+        """Distinct values of 'category' or 'region' (index-only scan) for filter pickers."""
+        if column not in ("category", "region"):
+            raise ValueError(column)
+        with self._lock:
+            return [v for (v,) in self._conn.execute(
+                f"SELECT DISTINCT {column} FROM reports WHERE {column} != '' ORDER BY 1")]
+
+    # ── geography ───────────────────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="report", op="set_location")
+    def set_location(self, report_id: int, lat=None, lon=None) -> bool:
+        """
+        Stamp a report with its coordinates (None = couldn't geocode) and bump its
+        cell's count. Each report is located once; returns False if it already was.
+        """
+        cell = geohash.encode(lat, lon, CELL_PRECISION) if lat is not None else ""
+        with self._lock, self._conn:
+            if self._conn.execute("UPDATE reports SET lat = ?, lon = ?, cell = ? WHERE id = ? AND cell IS NULL",
+                                  (lat, lon, cell, int(report_id))).rowcount != 1:
+                return False
+            if cell:
+                self._conn.execute(
+                    "INSERT INTO report_cells (cell, category, day, n) "
+                    "SELECT ?, category, substr(ts, 1, 10), 1 FROM reports WHERE id = ? "
+                    "ON CONFLICT (cell, category, day) DO UPDATE SET n = n + 1",
+                    (cell[:COUNT_PRECISION], int(report_id)))
+        return True
+
+    def unlocated(self, limit: int = 500):
+        """[(id, location, region), ...] for reports not yet geocoded, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, location, region FROM reports WHERE cell IS NULL ORDER BY id LIMIT ?",
+                (int(limit),)).fetchall()
+
+    def rebuild_cells(self) -> None:
+        """Recompute report_cells from the located reports (repair / after bulk edits)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM report_cells")
+            self._conn.execute(
+                "INSERT INTO report_cells (cell, category, day, n) "
+                "SELECT substr(cell, 1, ?), category, substr(ts, 1, 10), COUNT(*) FROM reports "
+                "WHERE cell != '' GROUP BY 1, 2, 3", (COUNT_PRECISION,))
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="hotspots")
+    def hotspots(self, precision: int = 5, days: int = 30, category=None, limit: int = 200, today=None):
+        """
+        [(cell, lat, lon, reports), ...] busiest first, counting reports from the
+        last ``days`` days in cells of the given precision (<= COUNT_PRECISION).
+        """
+        precision = max(1, min(int(precision), COUNT_PRECISION))
+        start = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+        sql = "SELECT substr(cell, 1, ?) AS c, SUM(n) FROM report_cells WHERE day >= ?"
+        params = [precision, start]
+        if category:
+            sql += " AND category = ?"; params.append(category)
+        sql += " GROUP BY c ORDER BY 2 DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, int(limit))).fetchall()
+        return [(c, *geohash.decode(c), n) for c, n in rows]
+
+    def cell_breakdown(self, cell: str, days: int = 30, today=None):
+        """{category: reports} for one cell (any precision <= COUNT_PRECISION) over the last ``days``."""
+        start = ((today or date.today()) - timedelta(days=days - 1)).isoformat()
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT category, SUM(n) FROM report_cells WHERE cell >= ? AND cell < ? AND day >= ? "
+                "GROUP BY category ORDER BY 2 DESC", (cell, cell + "~", start)).fetchall())
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="near")
+    def near(self, lat: float, lon: float, radius_m: float = 5000, limit: int = 50, start=None):
+        """
+        Reports within radius_m of a point, nearest first, as (id, *CSV_COLUMNS, distance_m).
+        Only the 3x3 block of cells around the point is read, via the cell index.
+        """
+        cells = geohash.cover(lat, lon, radius_m, CELL_PRECISION)
+        where = " OR ".join("(cell >= ? AND cell < ?)" for _ in cells)
+        params = [v for c in cells for v in (c, c + "~")]
+        if start:
+            where = f"({where}) AND ts >= ?"; params.append(str(start))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(_DB_COLUMNS)}, lat, lon FROM reports WHERE {where}", params).fetchall()
+        if not rows:
+            return []
+        # same haversine as nearest-station lookups, so the two can't disagree on distances
+        dists = stations.haversine_m(float(lat), float(lon), [r[-2] for r in rows], [r[-1] for r in rows])
+        found = [(*r[:-2], float(d)) for r, d in zip(rows, dists)]
+        found = sorted((r for r in found if r[-1] <= radius_m), key=lambda r: r[-1])
+        return found[:limit]
+
+    def iter_rows(self, batch: int = 2000, **filters):
+        """Yield matching rows in CSV_COLUMNS order, oldest first, on a private connection."""
+        where, params = _where(**filters)
+        conn = connect(self.path)
+        try:
+            cur = conn.execute(f"SELECT {', '.join(_DB_COLUMNS)} FROM reports{where} ORDER BY id", params)
+            while rows := cur.fetchmany(batch):
+                yield from rows
+        finally:
+            conn.close()
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="export_csv")
+    def export_csv(self, out, **filters) -> int:
+        """Stream matching reports as CSV to a path or text file object. Returns rows written."""
+        if isinstance(out, (str, Path)):
+            with open(out, "w", newline="", encoding="utf-8") as f:
+                return self.export_csv(f, **filters)
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        n = 0
+        for row in self.iter_rows(**filters):
+            writer.writerow(row)
+            n += 1
+        return n
+
+    @metrics.timed("envsense_storage_seconds", store="report", op="migrate_csv")
+    def migrate_csv(self, csv_path, force: bool = False, batch: int = 5000) -> int:
+        """One-time, streamed import of the legacy pollution_reports.csv. Returns rows added."""
+        csv_path = Path(csv_path)
+        marker = f"migrated:{csv_path.resolve()}"
+        if not csv_path.exists():
+            return 0
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone() and not force:
+                return 0
+        added = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = []
+            for rec in csv.DictReader(f):
+                rows.append([rec.get(c) or "" for c in CSV_COLUMNS])
+                if len(rows) >= batch:
+                    added += self._insert_many(rows); rows = []
+            added += self._insert_many(rows)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               (marker, str(added)))
+        return added
+
+    def _insert_many(self, rows) -> int:
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO reports ({', '.join(_DB_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [r[:-1] + [r[-1] or "None"] for r in rows])
+        return len(rows)
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m envsense.reportstore",
+                                 description="Migrate or export pollution reports.")
+    ap.add_argument("command", choices=["migrate", "export"])
+    ap.add_argument("csv", nargs="?", default="pollution_reports.csv")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    ap.add_argument("--force", action="store_true", help="re-run a migration already recorded")
+    ap.add_argument("--category")
+    ap.add_argument("--region")
+    ap.add_argument("--start", help="YYYY-MM-DD[ HH:MM:SS]")
+    ap.add_argument("--end", help="YYYY-MM-DD[ HH:MM:SS]")
+    args = ap.parse_args(argv)
+
+    store = ReportStore(args.db)
+    if args.command == "migrate":
+        print(f"imported {store.migrate_csv(args.csv, force=args.force)} reports into {args.db}")
+    else:
+        n = store.export_csv(args.csv, category=args.category, region=args.region,
+                             start=args.start, end=args.end)
+        print(f"exported {n} reports to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Per-provider guard rails for upstream HTTP calls.
+
+Each upstream gets a token bucket sized to its published quota, a circuit
+breaker, and a latency budget shared by all retries of one call. When a
+provider is down the breaker opens and calls fail in microseconds with
+``UpstreamUnavailable`` so the caller can fall back to cached data, instead
+of every page waiting out a full timeout.
+
+Interactive calls fail fast when the bucket is empty. Batch work that would
+rather wait its turn wraps its calls in ``queued(seconds)``.
+"""
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+from envsense import metrics
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+
+
+class UpstreamError(Exception):
+    """A provider call failed after retries (or was never attempted)."""
+
+
+class UpstreamUnavailable(UpstreamError):
+    """Short-circuited: breaker open, or no rate-limit token within the budget."""
+
+
+@contextmanager
+def queued(seconds: float):
+    """Let calls on this thread wait up to `seconds` for a rate-limit token before their budget starts."""
+    previous = getattr(_local, "queue_wait", 0.0)
+    _local.queue_wait = seconds
+    try:
+        yield
+    finally:
+        _local.queue_wait = previous
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate            # tokens per second
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting up to timeout seconds for the bucket to refill."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open after a cool-down -> closed on success."""
+
+    def __init__(self, failure_threshold: int = 3, reset_after: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True        # let exactly one trial request through
+                return True
+            return False
+
+    def release_probe(self) -> None:
+        """The trial request was never sent; let the next call probe instead."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Upstream:
+    """Rate-limited, retried, circuit-broken access to one provider."""
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, name: str, rate: float, burst: float, budget: float = 4.0,
+                 attempt_timeout: float = 3.0, retries: int = 2,
+                 failure_threshold: int = 3, reset_after: float = 30.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_after)
+        self.budget = budget
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.calls = self.failures = self.short_circuits = 0
+        self._latency = metrics.histogram("envsense_upstream_request_seconds", upstream=name)
+
+    def wait_budget(self) -> float:
+        """Longest a call on this thread may take: its queue allowance plus the latency budget."""
+        return getattr(_local, "queue_wait", 0.0) + self.budget
+
+    def _error(self, kind: str) -> None:
+        metrics.inc("envsense_upstream_errors_total", upstream=self.name, kind=kind)
+
+    def get(self, session, url, budget: float = None, **kwargs):
+        """
+        session.get() under this provider's limits; raises UpstreamError on failure.
+        budget overrides the default for slow bulk calls (attempt timeouts scale with it).
+        """
+        budget = self.budget if budget is None else budget
+        attempt_timeout = max(self.attempt_timeout, budget / (self.retries + 1))
+        if not self.breaker.allow():
+            self.short_circuits += 1
+            self._error("circuit_open")
+            raise UpstreamUnavailable(f"{self.name}: circuit open")
+        queue_wait = getattr(_local, "queue_wait", 0.0)
+        deadline = time.monotonic() + budget
+        last_exc = None
+        settled = False         # the breaker has been told how this call went
+        try:
+            for attempt in range(self.retries + 1):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.05:
+                    break
+                if not self.bucket.acquire(timeout=remaining + (queue_wait if attempt == 0 else 0)):
+                    if attempt:
+                        break       # a retry can't get a token: give up with the last error
+                    self.breaker.release_probe()    # nothing was sent, so nothing was learned
+                    settled = True
+                    self.short_circuits += 1
+                    self._error("rate_limited")
+                    raise UpstreamUnavailable(f"{self.name}: rate limit")
+                if attempt == 0 and queue_wait:
+                    deadline = time.monotonic() + budget        # time spent queued doesn't count
+                self.calls += 1
+                t0 = time.perf_counter()
+                try:
+                    timeout = min(attempt_timeout, max(deadline - time.monotonic(), 0.05))
+                    r = session.get(url, timeout=timeout, **kwargs)
+                    self._latency.observe(time.perf_counter() - t0)
+                    if r.status_code not in self.RETRY_STATUS:
+                        self.breaker.record_success()
+                        settled = True
+                        return r
+                    last_exc = UpstreamError(f"{self.name}: HTTP {r.status_code}")
+                    self._error(f"http_{r.status_code}")
+                except requests.RequestException as e:
+                    self._latency.observe(time.perf_counter() - t0)
+                    last_exc = e
+                    self._error("timeout" if isinstance(e, requests.Timeout) else "network")
+                if attempt == self.retries:
+                    break
+                # full jitter, capped by what is left of the budget
+                backoff = random.uniform(0, min(0.25 * 2 ** attempt, 1.0))
+                if time.monotonic() + backoff >= deadline:
+                    break
+                time.sleep(backoff)
+            self.failures += 1
+            self._error("gave_up")
+            self.breaker.record_failure()
+            settled = True
+            log.warning("%s failed: %s", self.name, last_exc)
+            raise UpstreamError(f"{self.name}: {last_exc}") from last_exc
+        finally:
+            if not settled:     # anything unexpected (a bug, an interrupt) still counts as a failure
+                self.breaker.record_failure()
+
+    def health(self) -> dict:
+        return {"state": self.breaker.state, "calls": self.calls, "failures": self.failures,
+                "short_circuits": self.short_circuits}
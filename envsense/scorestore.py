@@ -0,0 +1,340 @@
+"""
+Eco score log backed by SQLite (WAL mode).
+
+Replaces the read-modify-write of ``eco_score_log.csv``: a submission is a
+single indexed INSERT and the duplicate check is a unique-index lookup on
+(email, date), so both stay constant-time as the log grows.
+
+Monthly and ISO-weekly totals per user are kept in ``score_rollups`` and
+bumped in the same transaction as each submission, so a leaderboard is an
+index range scan over at most K rows rather than a GROUP BY over history.
+
+Per-user history is served by the (email, date) index, and current/longest
+consecutive-day streaks are cached in ``user_streaks`` and advanced on each
+submission, so a user's page costs O(their rows) regardless of log size.
+
+    python -m envsense.scorestore migrate eco_score_log.csv
+    python -m envsense.scorestore export  eco_score_log.csv
+"""
+import csv
+import threading
+from collections import defaultdict
+from datetime import date as _date, timedelta
+from pathlib import Path
+
+from envsense import metrics
+from envsense.db import DEFAULT_DB, connect
+CSV_COLUMNS = ["Name", "Email", "Date", "Score", "Actions"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS eco_scores (
+    id      INTEGER PRIMARY KEY,
+    name    TEXT    NOT NULL,
+    email   TEXT    NOT NULL,
+    date    TEXT    NOT NULL,            -- YYYY-MM-DD
+    score   INTEGER NOT NULL,
+    actions TEXT    NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS eco_scores_email_date ON eco_scores (email, date);
+CREATE INDEX IF NOT EXISTS eco_scores_date ON eco_scores (date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS score_rollups (
+    period TEXT    NOT NULL,             -- 'month' | 'week'
+    bucket TEXT    NOT NULL,             -- YYYY-MM | YYYY-Www
+    email  TEXT    NOT NULL,
+    name   TEXT    NOT NULL,
+    total  INTEGER NOT NULL,
+    PRIMARY KEY (period, bucket, email)
+);
+CREATE INDEX IF NOT EXISTS score_rollups_top ON score_rollups (period, bucket, total DESC);
+CREATE TABLE IF NOT EXISTS user_streaks (
+    email       TEXT    PRIMARY KEY,
+    last_date   TEXT    NOT NULL,        -- most recent active day
+    current     INTEGER NOT NULL,        -- run of consecutive days ending at last_date
+    longest     INTEGER NOT NULL,
+    active_days INTEGER NOT NULL
+);
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO score_rollups (period, bucket, email, name, total) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (period, bucket, email) DO UPDATE SET total = total + excluded.total, name = excluded.name
+"""
+
+
+def month_key(day: str) -> str:
+    """'2025-07-03' -> '2025-07'."""
+    return day[:7]
+
+
+def week_key(day: str) -> str:
+    """'2025-07-03' -> '2025-W27' (ISO week)."""
+    y, w, _ = _date.fromisoformat(day[:10]).isocalendar()
+    return f"{y}-W{w:02d}"
+
+
+def compute_streaks(days):
+    """
+    Streak state for a sorted list of distinct YYYY-MM-DD strings:
+    (last_date, current, longest, active_days), or None when empty.
+    """
+    if not days:
+        return None
+    current = longest = 1
+    prev = _date.fromisoformat(days[0])
+    for d in days[1:]:
+        d = _date.fromisoformat(d)
+        current = current + 1 if (d - prev).days == 1 else 1
+        longest = max(longest, current)
+        prev = d
+    return days[-1], current, longest, len(days)
+
+
+def _rollup_rows(name, email, day, score):
+    return [("month", month_key(day), email, name, score),
+            ("week", week_key(day), email, name, score)]
+
+
+class ScoreStore:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self._conn = connect(self.path)
+        self._lock = threading.Lock()
+        # bumped on every write; lets callers cache derived views (e.g. leaderboards)
+        self.version = 0
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            has_scores = self._conn.execute("SELECT 1 FROM eco_scores LIMIT 1").fetchone()
+            has_rollups = self._conn.execute("SELECT 1 FROM score_rollups LIMIT 1").fetchone()
+            has_streaks = self._conn.execute("SELECT 1 FROM user_streaks LIMIT 1").fetchone()
+        if has_scores and not has_rollups:
+            self.rebuild_rollups()
+        if has_scores and not has_streaks:
+            self.rebuild_streaks()
+
+    # ── writes ──────────────────────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="score", op="add")
+    def add(self, name: str, email: str, date: str, score: int, actions: str = "") -> bool:
+        """Record one day's submission. Returns False if (email, date) already exists."""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO eco_scores (name, email, date, score, actions) "
+                "VALUES (?, ?, ?, ?, ?)", (name, email, date, int(score), actions))
+            if cur.rowcount != 1:
+                return False
+            self._conn.executemany(_UPSERT_ROLLUP, _rollup_rows(name, email, date, int(score)))
+            self._advance_streak(email, date)
+            self.version += 1
+            return True
+
+    def _advance_streak(self, email: str, day: str) -> None:
+        """Fold one new active day into the cached streak (caller holds the lock/transaction)."""
+        row = self._conn.execute(
+            "SELECT last_date, current, longest, active_days FROM user_streaks WHERE email = ?",
+            (email,)).fetchone()
+        if row is None:
+            state = (day, 1, 1, 1)
+        else:
+            last, current, longest, active = row
+            gap = (_date.fromisoformat(day) - _date.fromisoformat(last)).days
+            if gap < 0:
+                # back-dated row: replay this user's days rather than guess
+                days = [d for (d,) in self._conn.execute(
+                    "SELECT date FROM eco_scores WHERE email = ? ORDER BY date", (email,))]
+                state = compute_streaks(days)
+            else:
+                current = current + 1 if gap == 1 else 1
+                state = (day, current, max(longest, current), active + 1)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO user_streaks (email, last_date, current, longest, active_days) "
+            "VALUES (?, ?, ?, ?, ?)", (email, *state))
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="rename")
+    def rename(self, email: str, new_name: str) -> int:
+        """Change the public display name on all of a user's rows."""
+        with self._lock, self._conn:
+            n = self._conn.execute(
+                "UPDATE eco_scores SET name = ? WHERE email = ?", (new_name, email)).rowcount
+            self._conn.execute("UPDATE score_rollups SET name = ? WHERE email = ?", (new_name, email))
+            self.version += 1
+            return n
+
+    def rebuild_rollups(self) -> None:
+        """Recompute every rollup from the raw log (backfill after bulk imports)."""
+        totals, names = defaultdict(int), {}
+        for name, email, day, score, _ in self.iter_rows():
+            names[email] = name
+            for period, bucket, *_ in _rollup_rows(name, email, day, score):
+                totals[(period, bucket, email)] += score
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM score_rollups")
+            self._conn.executemany(
+                "INSERT INTO score_rollups (period, bucket, email, name, total) VALUES (?, ?, ?, ?, ?)",
+                [(p, b, e, names[e], t) for (p, b, e), t in totals.items()])
+            self.version += 1
+
+    def rebuild_streaks(self) -> None:
+        """Recompute every user's streak from the raw log (backfill after bulk imports)."""
+        days = defaultdict(list)
+        conn = connect(self.path)
+        try:
+            for email, day in conn.execute("SELECT email, date FROM eco_scores ORDER BY email, date"):
+                days[email].append(day)
+        finally:
+            conn.close()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM user_streaks")
+            self._conn.executemany(
+                "INSERT INTO user_streaks (email, last_date, current, longest, active_days) "
+                "VALUES (?, ?, ?, ?, ?)", [(e, *compute_streaks(d)) for e, d in days.items()])
+            self.version += 1
+
+    # ── reads ───────────────────────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="score", op="has_submitted")
+    def has_submitted(self, email: str, date: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM eco_scores WHERE email = ? AND date = ?", (email, date)
+            ).fetchone() is not None
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="user_history")
+    def user_history(self, email: str):
+        """[(date, score), ...] for one user, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT date, score FROM eco_scores WHERE email = ? ORDER BY date", (email,)
+            ).fetchall()
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="streak")
+    def streak(self, email: str, today: str = None):
+        """
+        {"current", "longest", "active_days", "last_date"} for one user, or None.
+        The current streak counts as alive until a full day is missed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_date, current, longest, active_days FROM user_streaks WHERE email = ?",
+                (email,)).fetchone()
+        if row is None:
+            return None
+        last, current, longest, active = row
+        today = _date.fromisoformat(today) if today else _date.today()
+        if _date.fromisoformat(last) < today - timedelta(days=1):
+            current = 0
+        return {"current": current, "longest": longest, "active_days": active, "last_date": last}
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="top")
+    def top(self, period: str, bucket: str, limit: int = 10):
+        """[(name, total), ...] for one rollup bucket, highest first; limit=None for everyone."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT name, total FROM score_rollups WHERE period = ? AND bucket = ? "
+                "ORDER BY total DESC LIMIT ?", (period, bucket, -1 if limit is None else limit)).fetchall()
+
+    def month_totals(self, month: str, limit: int = 10):
+        """Top users for a YYYY-MM month."""
+        return self.top("month", month, limit)
+
+    def week_totals(self, week: str, limit: int = 10):
+        """Top users for an ISO week (YYYY-Www)."""
+        return self.top("week", week, limit)
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM eco_scores LIMIT 1").fetchone() is None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM eco_scores").fetchone()[0]
+
+    # ── CSV migration / export ──────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="score", op="migrate_csv")
+    def migrate_csv(self, csv_path, force: bool = False, batch: int = 5000) -> int:
+        """
+        One-time import of the legacy CSV log. Rows are streamed in batches and
+        duplicates of (email, date) are skipped. Returns the number of rows added.
+        """
+        csv_path = Path(csv_path)
+        marker = f"migrated:{csv_path.resolve()}"
+        if not csv_path.exists():
+            return 0
+        with self._lock:
+            done = self._conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone()
+        if done and not force:
+            return 0
+
+        added = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = []
+            for rec in csv.DictReader(f):
+                rows.append((rec.get("Name", ""), rec["Email"], rec["Date"][:10],
+                             int(float(rec.get("Score") or 0)), rec.get("Actions") or ""))
+                if len(rows) >= batch:
+                    added += self._insert_many(rows)
+                    rows = []
+            added += self._insert_many(rows)
+
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                               (marker, str(added)))
+        if added:
+            self.rebuild_rollups()
+            self.rebuild_streaks()
+        return added
+
+    def _insert_many(self, rows) -> int:
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO eco_scores (name, email, date, score, actions) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            return self._conn.total_changes - before
+
+    def iter_rows(self, batch: int = 5000):
+        """Yield every row as a tuple in CSV_COLUMNS order, a batch at a time.
+
+        Uses its own connection so a long export never holds the write lock."""
+        conn = connect(self.path)
+        try:
+            cur = conn.execute("SELECT name, email, date, score, actions FROM eco_scores ORDER BY id")
+            while rows := cur.fetchmany(batch):
+                yield from rows
+        finally:
+            conn.close()
+
+    @metrics.timed("envsense_storage_seconds", store="score", op="export_csv")
+    def export_csv(self, out) -> int:
+        """Write the full log as CSV to a path or text file object. Returns rows written."""
+        if isinstance(out, (str, Path)):
+            with open(out, "w", newline="", encoding="utf-8") as f:
+                return self.export_csv(f)
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        n = 0
+        for row in self.iter_rows():
+            writer.writerow(row)
+            n += 1
+        return n
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="python -m envsense.scorestore",
+                                 description="Migrate or export the eco score log.")
+    ap.add_argument("command", choices=["migrate", "export"])
+    ap.add_argument("csv", nargs="?", default="eco_score_log.csv")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    ap.add_argument("--force", action="store_true", help="re-run a migration already recorded")
+    args = ap.parse_args(argv)
+
+    store = ScoreStore(args.db)
+    if args.command == "migrate":
+        print(f"imported {store.migrate_csv(args.csv, force=args.force)} rows into {args.db}")
+    else:
+        print(f"exported {store.export_csv(args.csv)} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Process-wide singletons shared by every page and session.
+
+Each getter builds its object on first use and hands the same one back after
+that, so switching pages or rerunning a script never reopens a database or
+respawns a pool. Heavy modules are imported inside the getters; importing this
+module costs nothing.
+"""
+import logging
+import os
+import threading
+
+log = logging.getLogger(__name__)
+_lock = threading.RLock()
+_instances = {}
+
+
+def _singleton(factory):
+    def get():
+        inst = _instances.get(factory.__name__)
+        if inst is None:
+            with _lock:
+                inst = _instances.get(factory.__name__)
+                if inst is None:
+                    inst = _instances[factory.__name__] = factory()
+        return inst
+
+    get.__name__, get.__doc__ = factory.__name__, factory.__doc__
+    return get
+
+
+def admin_password() -> str:
+    return os.getenv("ENVSENSE_ADMIN_PASSWORD", "green@123")  # ← set your own in production
+
+
+def owm_key() -> str:
+    return os.getenv("OPENWEATHER_API_KEY", "").strip()
+
+
+def waqi_key() -> str:
+    return os.getenv("WAQI_API_KEY", "").strip()
+
+
+@_singleton
+def fetch_pool():
+    """Pool for the single-city tracker fan-out."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=16, thread_name_prefix="envsense-fetch")
+
+
+@_singleton
+def batch_pool():
+    """Separate, bounded pool so a large batch can't starve single-city lookups."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=int(os.getenv("BATCH_CONCURRENCY", "24")),
+                              thread_name_prefix="envsense-batch")
+
+
+@_singleton
+def aqi_history():
+    """Local history store (Parquet under aqi_history/)."""
+    from envsense.timeseries import AqiHistory
+    return AqiHistory()
+
+
+@_singleton
+def snapshot_poller():
+    """Background AQI snapshots for ENVSENSE_POLL_LOCATIONS, or False when none are configured."""
+    if not os.getenv("ENVSENSE_POLL_LOCATIONS", "").strip():
+        return False        # don't pay for the timeseries imports on every cold start
+    from envsense.timeseries import SnapshotPoller, poll_locations
+    minutes = float(os.getenv("ENVSENSE_POLL_MINUTES", "30"))
+    poller = SnapshotPoller(aqi_history(), poll_locations(), minutes * 60, owm_key(), waqi_key())
+    poller.start()
+    return poller
+
+
+@_singleton
+def score_store():
+    """One SQLite connection per process; imports the legacy CSV log on first boot."""
+    from envsense.scorestore import ScoreStore
+    store = ScoreStore()
+    store.migrate_csv("eco_score_log.csv")
+    return store
+
+
+@_singleton
+def report_store():
+    """One SQLite connection per process; imports the legacy CSV on first boot."""
+    from envsense.reportstore import ReportStore
+    store = ReportStore()
+    store.migrate_csv("pollution_reports.csv")
+    return store
+
+
+@_singleton
+def metrics_server():
+    """Prometheus /metrics listener on ENVSENSE_METRICS_PORT, or False when not configured or it can't bind."""
+    port = os.getenv("ENVSENSE_METRICS_PORT")
+    if not port:
+        return False
+    from envsense import metrics
+    try:
+        return metrics.serve(int(port))
+    except (OSError, ValueError):
+        # e.g. port in use or not a number; the app runs on without the endpoint
+        log.exception("can't serve metrics on ENVSENSE_METRICS_PORT=%r", port)
+        return False
+
+
+@_singleton
+def image_store():
+    from envsense.imagestore import ImageStore
+    return ImageStore()
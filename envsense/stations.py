@@ -0,0 +1,174 @@
+"""
+Offline nearest-station lookup for OpenAQ.
+
+The station catalogue changes rarely, so it is downloaded once into a local
+Parquet file and indexed in 1° grid buckets. Resolving the nearest station
+is then a handful of vectorised haversine distances instead of a radius
+query per coordinate, and callers can key their caches on the station id so
+nearby coordinates share one entry.
+
+    python -m envsense.stations refresh [--countries IN,NP]
+"""
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.getenv("ENVSENSE_STATIONS_FILE", "openaq_stations.parquet")
+MAX_AGE = 7 * 24 * 3600          # refresh the catalogue weekly
+PAGE_BUDGET = 90.0               # seconds per catalogue page, retries included
+STALE_AFTER = timedelta(days=14)  # ignore stations that stopped reporting
+EARTH_M = 6_371_000.0
+CELL_DEG = 1.0
+
+
+def haversine_m(lat, lon, lats, lons):
+    """Great-circle distance in metres from one point to arrays of points."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (np.sin((lats - lat) / 2) ** 2
+         + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+    return 2 * EARTH_M * np.arcsin(np.sqrt(a))
+
+
+class StationIndex:
+    def __init__(self, catalogue: pd.DataFrame):
+        df = catalogue.reset_index(drop=True)
+        self.ids = df["id"].to_numpy()
+        self.names = df["name"].to_numpy()
+        self.lats = df["lat"].to_numpy(dtype=np.float64)
+        self.lons = df["lon"].to_numpy(dtype=np.float64)
+        cells = pd.Series(range(len(df))).groupby(
+            [np.floor(self.lats / CELL_DEG).astype(int), np.floor(self.lons / CELL_DEG).astype(int)])
+        self._cells = {key: idx.to_numpy() for key, idx in cells}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, lat, lon, radius_m):
+        # enough rings of cells to cover the radius, widened for longitude shrinkage
+        ring_lat = math.ceil(radius_m / 111_000 / CELL_DEG)
+        ring_lon = math.ceil(radius_m / (111_000 * max(math.cos(math.radians(lat)), 0.01)) / CELL_DEG)
+        ci, cj = math.floor(lat / CELL_DEG), math.floor(lon / CELL_DEG)
+        n_lon = int(360 / CELL_DEG)
+        found = [self._cells.get((i, ((j + n_lon // 2) % n_lon) - n_lon // 2))
+                 for i in range(ci - ring_lat, ci + ring_lat + 1)
+                 for j in range(cj - ring_lon, cj + ring_lon + 1)]
+        found = [f for f in found if f is not None]
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def nearest(self, lat, lon, k: int = 1, radius_m: float = 40000):
+        """Up to k stations within radius_m, closest first, as dicts with distance_m."""
+        idx = self._candidates(float(lat), float(lon), radius_m)
+        if idx.size == 0:
+            return []
+        d = haversine_m(float(lat), float(lon), self.lats[idx], self.lons[idx])
+        keep = d <= radius_m
+        idx, d = idx[keep], d[keep]
+        order = np.argsort(d)[:k]
+        return [{"id": int(self.ids[i]), "name": self.names[i], "lat": float(self.lats[i]),
+                 "lon": float(self.lons[i]), "distance_m": float(dist)}
+                for i, dist in zip(idx[order], d[order])]
+
+
+def download_catalogue(session, parameters, countries=None, page_size=1000, upstream=None) -> pd.DataFrame:
+    """
+    Page through OpenAQ /v2/locations and keep stations that report a tracked pollutant.
+    Requests go through ``upstream`` (an ``envsense.resilience.Upstream``) when given,
+    so they count against the provider's quota. Any failed page raises: a partial
+    catalogue would look complete and resolve coordinates to the wrong station.
+    """
+    rows, page = [], 1
+    params = {"limit": page_size, "parameter": ",".join(parameters)}
+    if countries:
+        params["country"] = ",".join(countries)
+    while True:
+        url, query = "https://api.openaq.org/v2/locations", {**params, "page": page}
+        if upstream is not None:
+            r = upstream.get(session, url, params=query, budget=PAGE_BUDGET)
+        else:
+            r = session.get(url, params=query, timeout=30)
+        r.raise_for_status()
+        r = r.json()
+        results = r.get("results") or []
+        for loc in results:
+            c = loc.get("coordinates") or {}
+            if c.get("latitude") is None or c.get("longitude") is None:
+                continue
+            rows.append({"id": loc["id"], "name": loc.get("name") or "",
+                         "country": loc.get("country") or "",
+                         "lat": c["latitude"], "lon": c["longitude"],
+                         "last_updated": loc.get("lastUpdated")})
+        if len(results) < page_size:
+            break
+        page += 1
+    df = pd.DataFrame(rows, columns=["id", "name", "country", "lat", "lon", "last_updated"])
+    df["last_updated"] = pd.to_datetime(df["last_updated"], utc=True, errors="coerce")
+    return df.drop_duplicates("id")
+
+
+def load_index(path=DEFAULT_PATH):
+    """(StationIndex, is_stale) from the local catalogue, or (None, True) if there is none."""
+    path = Path(path)
+    if not path.exists():
+        return None, True
+    df = pd.read_parquet(path)
+    cutoff = datetime.now(timezone.utc) - STALE_AFTER
+    df = df[df["last_updated"].isna() | (df["last_updated"] >= cutoff)]
+    return StationIndex(df), time.time() - path.stat().st_mtime > MAX_AGE
+
+
+def refresh(session, parameters, path=DEFAULT_PATH, countries=None, upstream=None) -> int:
+    """
+    Download the catalogue and atomically replace the local file. Returns station
+    count. If any page fails this raises and the existing file is left as it was.
+    """
+    df = download_catalogue(session, parameters, countries, upstream=upstream)
+    if df.empty:
+        return 0
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    df.to_parquet(tmp, index=False)
+    tmp.replace(path)
+    return len(df)
+
+
+def configured_countries():
+    return [c.strip() for c in os.getenv("OPENAQ_STATION_COUNTRIES", "").split(",") if c.strip()]
+
+
+def main(argv=None):
+    import argparse
+    from envsense import providers
+    ap = argparse.ArgumentParser(prog="python -m envsense.stations",
+                                 description="Download or query the local OpenAQ station catalogue.")
+    sub = ap.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("refresh")
+    r.add_argument("--countries", default=",".join(configured_countries()))
+    n = sub.add_parser("nearest")
+    n.add_argument("lat", type=float)
+    n.add_argument("lon", type=float)
+    n.add_argument("-k", type=int, default=3)
+    ap.add_argument("--path", default=DEFAULT_PATH)
+    args = ap.parse_args(argv)
+
+    if args.command == "refresh":
+        countries = [c for c in args.countries.split(",") if c]
+        print(f"stored {providers.refresh_station_catalogue(args.path, countries)} stations")
+    else:
+        index, _ = load_index(args.path)
+        if index is None:
+            ap.error(f"no catalogue at {args.path}; run 'refresh' first")
+        for s in index.nearest(args.lat, args.lon, k=args.k):
+            print(f"{s['id']:>8}  {s['distance_m'] / 1000:6.1f} km  {s['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Local AQI history: Parquet files partitioned by day, filled by a background poller.
+
+    aqi_history/date=2025-07-03/part-081500-<id>.parquet   (one per poll round)
+    aqi_history/date=2025-07-02/part-0.parquet             (compacted past day)
+
+A query for a date range only opens that range's partitions, so the date
+picker is answered locally in milliseconds without an upstream call.
+
+    python -m envsense.timeseries poll --locations "Mumbai,Delhi" --minutes 30
+"""
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from envsense import cpcb, metrics, providers
+from envsense.diskcache import geocode_key
+from envsense.resilience import UpstreamError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ROOT = os.getenv("ENVSENSE_HISTORY_DIR", "aqi_history")
+METRICS = ["aqi", *providers.POLLUTANTS, "temp", "humidity", "wind"]
+COLUMNS = ["ts", "location", "lat", "lon", *METRICS]
+
+
+def poll_locations():
+    """Locations to snapshot, from ENVSENSE_POLL_LOCATIONS (comma-separated)."""
+    return [c.strip() for c in os.getenv("ENVSENSE_POLL_LOCATIONS", "").split(",") if c.strip()]
+
+
+class AqiHistory:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def _day_dir(self, day: date) -> Path:
+        return self.root / f"date={day.isoformat()}"
+
+    # ── writes ──────────────────────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="history", op="append")
+    def append(self, rows) -> None:
+        """Write one poll round (list of dicts) as a new file in today's partition."""
+        if not rows:
+            return
+        df = pd.DataFrame(rows).reindex(columns=COLUMNS)
+        df["ts"] = pd.to_datetime(df["ts"])
+        df[METRICS] = df[METRICS].astype("float32")
+        for day, part in df.groupby(df["ts"].dt.date):
+            d = self._day_dir(day)
+            d.mkdir(parents=True, exist_ok=True)
+            name = f"part-{datetime.now():%H%M%S}-{uuid.uuid4().hex[:6]}.parquet"
+            tmp = d / f".{name}.tmp"
+            part.to_parquet(tmp, index=False)
+            tmp.replace(d / name)
+
+    def compact(self, day: date) -> bool:
+        """Merge a finished day's per-round files into one. Returns True if it did work."""
+        d = self._day_dir(day)
+        files = sorted(d.glob("part-*.parquet")) if d.exists() else []
+        if len(files) <= 1:
+            return False
+        df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True).sort_values("ts")
+        tmp = d / ".part-0.parquet.tmp"
+        df.to_parquet(tmp, index=False)
+        for f in files:
+            f.unlink()
+        tmp.replace(d / "part-0.parquet")
+        return True
+
+    # ── reads ───────────────────────────────────────────────
+    @metrics.timed("envsense_storage_seconds", store="history", op="query")
+    def query(self, location: str, start: date, end: date = None) -> pd.DataFrame:
+        """All snapshots for one location between start and end (inclusive), oldest first."""
+        end = end or start
+        key = geocode_key(location)
+        frames = []
+        day = start
+        while day <= end:
+            d = self._day_dir(day)
+            if d.exists():
+                for f in d.glob("part-*.parquet"):
+                    frames.append(pd.read_parquet(f, filters=[("location", "==", key)]))
+            day += timedelta(days=1)
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=COLUMNS)
+        return pd.concat(frames, ignore_index=True).sort_values("ts", ignore_index=True)
+
+    @metrics.timed("envsense_storage_seconds", store="history", op="daily_summary")
+    def daily_summary(self, location: str, start: date, end: date = None, metric: str = "aqi"):
+        """Per-day min / mean / max of one metric, indexed by date."""
+        df = self.query(location, start, end)
+        if df.empty:
+            return pd.DataFrame(columns=["min", "mean", "max"])
+        return df.groupby(df["ts"].dt.date)[metric].agg(["min", "mean", "max"])
+
+    def days(self):
+        """Dates that have at least one stored snapshot."""
+        if not self.root.exists():
+            return []
+        return sorted(date.fromisoformat(p.name[5:]) for p in self.root.glob("date=*"))
+
+
+def snapshot(location: str, owm_key: str, waqi_key: str):
+    """
+    One row of AQI + concentrations + weather for a location, or None if it can't
+    be geocoded. Raises UpstreamError if the geocoder is down and has nothing cached.
+    """
+    geo = providers.geocode_city(location, owm_key)
+    if not geo:
+        return None
+    lat, lon = geo["lat"], geo["lon"]
+    waqi = providers.fetch_waqi(lat, lon, waqi_key) or {}
+    concs, _, _ = providers.fetch_concentrations(lat, lon)
+    w = providers.fetch_weather(lat, lon, owm_key) or {}
+    aqi = waqi.get("aqi")
+    row = {
+        "ts": datetime.now(), "location": geocode_key(location), "lat": lat, "lon": lon,
+        "aqi": float(aqi) if str(aqi).isdigit() else None,
+        "temp": w.get("main", {}).get("temp"),
+        "humidity": w.get("main", {}).get("humidity"),
+        "wind": w.get("wind", {}).get("speed"),
+    }
+    for p in providers.POLLUTANTS:
+        m = (concs or {}).get(p) or {}
+        # stored in µg/m³, the unit the CPCB breakpoints (and the history view) assume
+        row[p] = cpcb.to_ugm3(p, m["value"], m.get("unit")) if m.get("value") is not None else None
+    return row
+
+
+class SnapshotPoller(threading.Thread):
+    """Daemon thread that snapshots each location every `interval` seconds."""
+
+    def __init__(self, history: AqiHistory, locations, interval: float, owm_key: str, waqi_key: str):
+        super().__init__(name="envsense-poller", daemon=True)
+        self.history = history
+        self.locations = list(locations)
+        self.interval = interval
+        self.keys = (owm_key, waqi_key)
+        self.last_run = None
+        self._halt = threading.Event()
+
+    def poll_once(self) -> int:
+        rows = []
+        for loc in self.locations:
+            try:
+                row = snapshot(loc, *self.keys)
+            except UpstreamError as e:
+                log.warning("snapshot skipped for %s: %s", loc, e)
+                continue
+            except Exception:
+                log.exception("snapshot failed for %s", loc)
+                continue
+            if row:
+                rows.append(row)
+        self.history.append(rows)
+        # first round after midnight: fold yesterday's per-round files into one
+        if self.last_run and self.last_run.date() < date.today():
+            self.history.compact(self.last_run.date())
+        self.last_run = datetime.now()
+        return len(rows)
+
+    def run(self):
+        while not self._halt.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("poll round failed")
+            self._halt.wait(max(self.interval - (time.monotonic() - started), 1.0))
+
+    def stop(self):
+        self._halt.set()
+
+
+def main(argv=None):
+    import argparse
+    from dotenv import load_dotenv
+    load_dotenv()
+    ap = argparse.ArgumentParser(prog="python -m envsense.timeseries",
+                                 description="Record AQI snapshots into the local history store.")
+    ap.add_argument("command", choices=["poll", "once"])
+    ap.add_argument("--locations", default=",".join(poll_locations()))
+    ap.add_argument("--minutes", type=float, default=float(os.getenv("ENVSENSE_POLL_MINUTES", "30")))
+    ap.add_argument("--root", default=DEFAULT_ROOT)
+    args = ap.parse_args(argv)
+
+    locations = [c.strip() for c in args.locations.split(",") if c.strip()]
+    if not locations:
+        ap.error("no locations: pass --locations or set ENVSENSE_POLL_LOCATIONS")
+    poller = SnapshotPoller(AqiHistory(args.root), locations, args.minutes * 60,
+                            os.getenv("OPENWEATHER_API_KEY", "").strip(),
+                            os.getenv("WAQI_API_KEY", "").strip())
+    if args.command == "once":
+        print(f"stored {poller.poll_once()} snapshot(s)")
+    else:
+        logging.basicConfig(level=logging.INFO)
+        poller.run()
+
+
+if __name__ == "__main__":
+    main()